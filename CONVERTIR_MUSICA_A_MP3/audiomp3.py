@@ -1,368 +1,889 @@
-"""
-Script para conversión masiva de audio y organización de archivos.
-
-Procesa recursivamente todos los archivos en un directorio de entrada, convirtiendo 
-archivos de audio (FLAC, WAV, OGG, M4A) al formato MP3 a 320 kbps mientras preserva 
-los metadatos originales. Los archivos que no son de audio (imágenes, documentos, 
-letras) se copian sin modificaciones. La estructura de carpetas original se replica 
-en el directorio de salida.
-
-* Características:
-    * Procesamiento paralelo mediante múltiples hilos para mayor rendimiento
-    * Barra de progreso con tiempo estimado de finalización
-    * Omisión automática de archivos ya procesados
-    * Registro detallado de conversiones, copias y errores en formato JSON
-"""
-
-# Primero importo las librerías necesarias
-import os # Para operaciones del sistema
-import shutil # Para copiar archivos
-import subprocess # Para llamar a ffmpeg
-import json # Para manejar archivos JSON
-import time # Para medir tiempos
-from pathlib import Path # Para manejar rutas de archivos
-from concurrent.futures import ThreadPoolExecutor, as_completed # Para procesamiento paralelo
-import argparse # Para manejar argumentos de línea de comandos
-from typing import Literal # Para manejar argumentos de línea de comandos
-from datetime import datetime # Para manejar fechas y horas
-
-BASE_DIR = Path(__file__).resolve().parent # Directorio base del script
-LOGS_DIR = BASE_DIR / "logs" # Directorio para logs
-
-# -------------------- Configuración --------------------
-AUDIO_FORMATS = {".flac", ".wav", ".ogg", ".m4a"} # Formatos de audio a convertir
-
-timestamp = datetime.now().strftime("%d%m%Y_%H%M%S") # formato en ddmmyyyy_hhmmss.
-ERROR_LOG = LOGS_DIR / f"log_errors_{timestamp}.json" # Archivo de log para errores
-SUMMARY_LOG = LOGS_DIR / f"log_summary_{timestamp}.json" # Archivo de log para resumen
-
-CPU_CORES = os.cpu_count() or 2 # Número de núcleos de CPU para procesamiento paralelo (predeterminado a 2 si no se puede determinar)
-
-# -------------------- Funciones --------------------
-def convert_or_copy(file_path: Path, input_dir: Path, output_dir: Path) -> tuple[Literal["converted", "copied", "skipped", "error"], Path | tuple[Path, str]]:
-    """
-    Convierte un archivo de audio a MP3 y copia otros archivos.
-    """
-    rel_path = file_path.relative_to(input_dir) # Ruta relativa del archivo
-    out_file = output_dir / rel_path # Ruta de salida correspondiente
-    out_file.parent.mkdir(parents=True, exist_ok=True) # Crear directorios si no existen
-    ext = file_path.suffix.lower() # Extensión del archivo
-
-    # Intentar convertir o copiar el archivo
-    try:
-        # Convertir si es un formato de audio
-        if ext in AUDIO_FORMATS:
-            # Cambiar la extensión a .mp3
-            out_file = out_file.with_suffix(".mp3")
-            # Omitir si el archivo ya existe
-            if out_file.exists():
-                return "skipped", out_file # Archivo ya procesado
-            
-            # CONFIGURACIÓN PARA WINDOWS: Ocultar ventana de consola
-            startupinfo = None # Inicializar variable
-            if os.name == 'nt':
-                # Configurar para ocultar la ventana de consola en Windows
-                startupinfo = subprocess.STARTUPINFO() # Crear objeto STARTUPINFO
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW # Establecer bandera para ocultar ventana
-
-            # Ejecutar ffmpeg para convertir el archivo
-            result = subprocess.run(
-                ["ffmpeg", "-i", str(file_path), "-b:a", "320k", "-map_metadata", "0", str(out_file), "-y"], # Comando ffmpeg
-                capture_output=True, # Capturar salida
-                text=True, # Salida como texto
-                encoding="utf-8", # Codificación UTF-8
-                errors="replace", # Reemplazar errores de codificación
-                startupinfo=startupinfo # Usar configuración para ocultar ventana en Windows
-            )
-            # Si hay un error en la conversión, registrar el error
-            if result.returncode != 0 or "error" in result.stderr.lower():
-                raise RuntimeError(result.stderr) # Lanzar excepción con el error
-            return "converted", out_file # Retornar éxito de conversión
-        # Copiar otros archivos
-        else:
-            # Omitir si el archivo ya existe
-            if not out_file.exists():
-                shutil.copy2(file_path, out_file) # Copiar archivo preservando metadatos
-            return "copied", out_file # Retornar éxito de copia
-    # Manejar excepciones y registrar errores
-    except Exception as e:
-        return "error", (file_path, str(e)) # Retornar error con detalles
-
-# -------------------- Main --------------------
-
-# Script normal.
-def main_script(input_dir: Path, output_dir: Path) -> None:
-    """
-    Función principal para procesar todos los archivos en el directorio de entrada.
-    1. Recopila todos los archivos en el directorio de entrada.
-    2. Procesa cada archivo en paralelo, convirtiendo o copiando según corresponda.
-    3. Muestra una barra de progreso con velocidad y ETA.
-    4. Guarda logs de errores y un resumen al finalizar.
-    5. Imprime la ubicación de los archivos procesados y los logs.
-    """
-
-    #importo las librerías necesarias
-    try:
-        from tqdm import tqdm # Para la barra de progreso
-    except ImportError:
-        print("Error: Necesitas instalar 'tqdm' para usar el modo consola.")
-        return
-    
-    # Recopilar todos los archivos de todos los álbumes
-    all_files = [f for f in input_dir.rglob("*") if f.is_file()] # Lista de todos los archivos
-    total_files = len(all_files) # Contar el total de archivos
-
-    if total_files == 0:
-        print("No se encontraron archivos para procesar en el directorio de entrada.")
-        return
-
-    all_results = {"converted": [], "copied": [], "error": []} # Diccionario para almacenar resultados
-    errores = [] # Lista para almacenar errores
-
-    start_time = time.time() # Tiempo de inicio
-
-    # Procesamiento paralelo de archivos
-    with ThreadPoolExecutor(max_workers=CPU_CORES) as executor:
-        futures = {executor.submit(convert_or_copy, f, input_dir, output_dir): f for f in all_files} # Enviar tareas al executor
-
-        # Barra de progreso con tqdm
-        with tqdm(total=total_files, desc="Procesando archivos", dynamic_ncols=True) as pbar:
-            # Iterar sobre los resultados a medida que se completan
-            for future in as_completed(futures):
-                status, result_data = future.result() # Obtener resultado de la tarea
-                # Actualizar resultados según el estado
-                if status == "error":
-                    f_path, error_msg = result_data if isinstance(result_data, tuple) else (result_data, "Error desconocido")
-                    all_results["error"].append({"file": f_path.name, "error": error_msg})
-                    errores.append({"file": f_path.name, "error": error_msg}) # Agregar a la lista de errores
-                else:
-                    all_results[status].append(str(result_data)) # Agregar archivo a la lista correspondiente
-
-                # Actualizar barra de progreso
-                pbar.update(1)
-                elapsed = time.time() - start_time # Tiempo
-                speed = pbar.n / elapsed if elapsed > 0 else 0 # Velocidad en archivos por segundo
-                remaining = total_files - pbar.n # Archivos restantes
-                eta = remaining / speed if speed > 0 else 0 # Tiempo estimado restante
-                # Actualizar información en la barra de progreso
-                pbar.set_postfix({"Velocidad_t/s": f"{speed:.2f}", "ETA": f"{int(eta//60):02d}:{int(eta%60):02d}"})
-
-    # Calcular tiempos y totales
-    elapsed_total = time.time() - start_time
-    total_tracks = len(all_results["converted"]) + len(all_results["copied"]) + len(all_results["error"]) # Total de archivos procesados
-
-    LOGS_DIR.mkdir(parents=True, exist_ok=True) # Crear directorio de logs si no existe
-
-    # Guardar errores
-    with open(ERROR_LOG, "w", encoding="utf-8") as f:
-        json.dump(errores, f, indent=2, ensure_ascii=False) # Guardar errores en JSON
-
-    # Guardar resumen
-    with open(SUMMARY_LOG, "w", encoding="utf-8") as f:
-        summary = {
-            "converted": all_results["converted"],
-            "copied": all_results["copied"],
-            "failed": all_results["error"],
-            "total_files_processed": total_tracks,
-            "total_time_sec": int(elapsed_total),
-            "average_speed_tracks_per_sec": round(total_tracks / elapsed_total, 2) if elapsed_total > 0 else 0
-        }
-        json.dump(summary, f, indent=2, ensure_ascii=False) # Guardar resumen en JSON
-
-    print(f"\nProceso completado. Archivos en: {output_dir}")
-    print(f"Resumen guardado en: {SUMMARY_LOG}")
-    print(f"Errores guardados en: {ERROR_LOG}")
-
-# Script con GUI:
-def main_with_gui() -> None:
-    """
-    Función principal para procesar todos los archivos en el directorio de entrada con GUI.
-    Similar a la función main(), pero con una interfaz gráfica hecha en PyQt6.
-    """
-    # primero se importan las librerías necesarias para la GUI
-    try:
-        from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QFileDialog, QTextEdit, QProgressBar
-        from PyQt6.QtCore import QThread, pyqtSignal
-    except ImportError:
-        print("Error: Necesitas instalar 'PyQt6' para usar la interfaz gráfica.")
-        return
-
-    # Clase para el hilo de procesamiento
-    class WorkerThread(QThread):
-        progress = pyqtSignal(int) # Señal para actualizar progreso
-        log = pyqtSignal(str) # Señal para enviar logs
-        finished = pyqtSignal() # Señal para indicar finalización
-
-        # Constructor
-        def __init__(self, input_dir, output_dir):
-            super().__init__() # Inicializar QThread
-            self.input_dir = Path(input_dir) # Directorio de entrada
-            self.output_dir = Path(output_dir) # Directorio de salida
-
-        # Método para ejecutar el hilo
-        def run(self):
-            # Recopilar todos los archivos de todos los álbumes
-            all_files = [f for f in self.input_dir.rglob("*") if f.is_file()] # Lista de todos los archivos
-            total_files = len(all_files) # Contar el total de archivos
-
-            if total_files == 0:
-                self.log.emit("No se encontraron archivos para procesar en el directorio de entrada.")
-                self.finished.emit()
-                return
-
-            start_time = time.time() # Tiempo de inicio
-            errores = [] # Lista para almacenar errores
-
-            # Procesamiento paralelo de archivos
-            with ThreadPoolExecutor(max_workers=CPU_CORES) as executor:
-                futures = {executor.submit(convert_or_copy, f, self.input_dir, self.output_dir): f for f in all_files} # Enviar tareas al executor
-
-                # Iterar sobre los resultados a medida que se completan
-                for i, future in enumerate(as_completed(futures)):
-                    status, result_data = future.result() # Obtener resultado de la tarea
-                    # Enviar logs según el estado
-                    if status == "error":
-                        f_path, error_msg = result_data if isinstance(result_data, tuple) else (result_data, "Unknown error")
-                        self.log.emit(f"Error al procesar {f_path.name}: {error_msg}") # Enviar log de error
-                        errores.append({"file": f_path.name, "error": error_msg})
-
-                    else:
-                        if isinstance(result_data, Path):
-                            msg = f"Convertido: {result_data.name}" if status == "converted" else f"Copiado: {result_data.name}"
-                            self.log.emit(msg) # Enviar log de éxito
-                        else:
-                            self.log.emit(f"Error desconocido con el archivo.") # Enviar log de error desconocido
-
-                    self.progress.emit(int((i + 1) / total_files * 100)) # Actualizar progreso
-
-            elapsed_total = time.time() - start_time # Tiempo total
-            self.log.emit(f"Proceso completado en {int(elapsed_total)} segundos.") # Enviar log de finalización
-
-            LOGS_DIR.mkdir(parents=True, exist_ok=True) # Crear directorio de logs si no existe
-
-            #crear archivo de log de errores
-            with open(ERROR_LOG, "w", encoding="utf-8") as f:
-                json.dump(errores, f, indent=2, ensure_ascii=False) # Guardar errores en JSON
-            self.log.emit(f"Errores guardados en: {ERROR_LOG}") # Indicar ubicación del log de errores
-
-            #crear archivo de log de resumen
-            with open(SUMMARY_LOG, "w", encoding="utf-8") as f:
-                summary = {
-                    "failed": errores,
-                    "total_files_processed": total_files,
-                    "total_time_sec": int(elapsed_total),
-                    "average_speed_tracks_per_sec": round(total_files / elapsed_total, 2) if elapsed_total > 0 else 0
-                }
-                json.dump(summary, f, indent=2, ensure_ascii=False) # Guardar resumen en JSON
-
-            self.finished.emit() # Emitir señal de finalización
-        
-    # Clase para la ventana principal
-    class MainWindow(QWidget):
-        def __init__(self):
-            super().__init__()
-            self.setWindowTitle("Conversión Masiva de Audio a MP3")
-            self.setGeometry(100, 100, 600, 400)
-
-            main_layout = QVBoxLayout()
-
-            self.input_button = QPushButton("Seleccionar Directorio de Entrada")
-            self.input_button.clicked.connect(self.select_input_directory)
-            main_layout.addWidget(self.input_button)
-
-            self.output_button = QPushButton("Seleccionar Directorio de Salida")
-            self.output_button.clicked.connect(self.select_output_directory)
-            main_layout.addWidget(self.output_button)
-
-            self.start_button = QPushButton("Iniciar Procesamiento")
-            self.start_button.clicked.connect(self.start_processing)
-            main_layout.addWidget(self.start_button)
-
-            self.progress_bar = QProgressBar()
-            main_layout.addWidget(self.progress_bar)
-
-            self.log_text = QTextEdit()
-            self.log_text.setReadOnly(True)
-            main_layout.addWidget(self.log_text)
-
-            self.setLayout(main_layout)
-
-            self.input_dir = ""
-            self.output_dir = ""
-            self.worker_thread = None
-
-        def select_input_directory(self):
-            dir_path = QFileDialog.getExistingDirectory(self, "Seleccionar Directorio de Entrada")
-            if dir_path:
-                self.input_dir = dir_path
-                self.log_text.append(f"Directorio de entrada seleccionado: {dir_path}")
-
-        def select_output_directory(self):
-            dir_path = QFileDialog.getExistingDirectory(self, "Seleccionar Directorio de Salida")
-            if dir_path:
-                self.output_dir = dir_path
-                self.log_text.append(f"Directorio de salida seleccionado: {dir_path}")
-
-        def start_processing(self):
-            if not self.input_dir or not self.output_dir:
-                self.log_text.append("Por favor, seleccione ambos directorios antes de iniciar.")
-                return
-
-            self.worker_thread = WorkerThread(self.input_dir, self.output_dir)
-            self.worker_thread.progress.connect(self.update_progress)
-            self.worker_thread.log.connect(self.append_log)
-            self.worker_thread.finished.connect(self.processing_finished)
-            self.worker_thread.start()
-            self.log_text.append("Procesamiento iniciado...")
-
-        def update_progress(self, value):
-            self.progress_bar.setValue(value)
-
-        def append_log(self, message):
-            self.log_text.append(message)
-
-        def processing_finished(self):
-            self.log_text.append("Procesamiento finalizado.")
-    
-    import sys # Importar sys para la aplicación GUI
-    # Iniciar la aplicación GUI
-    app = QApplication([])
-    window = MainWindow()
-    window.show()
-    sys.exit(app.exec())
-
-#main
-def main() -> None:
-    """
-    Función principal para decidir si ejecutar el script normal o con GUI.
-    Parametros:
-        - gui: Booleano que indica si se debe usar la GUI o no.
-        - input_dir: Directorio de entrada si no se usa GUI.
-        - output_dir: Directorio de salida si no se usa GUI.
-    """
-    parser = argparse.ArgumentParser(description="Conversión masiva de audio y organización de archivos.") # Configurar el parser de argumentos
-    parser.add_argument("--gui", action="store_true", help="Usar interfaz gráfica.") # Argumento para usar GUI
-    parser.add_argument("--input_dir", type=str, nargs="?", help="Directorio de entrada con archivos a procesar.") # Argumento para el directorio de entrada
-    parser.add_argument("--output_dir", type=str, nargs="?", help="Directorio de salida para archivos procesados.") # Argumento para el directorio de salida
-    args = parser.parse_args() # Parsear los argumentos
-
-    # Si existe el argumento --gui, ejecutar con GUI
-    if args.gui:
-        main_with_gui() # Ejecutar con GUI
-    # Sino, ejecutar el script normal
-    else:
-        if not args.input_dir or not args.output_dir:
-            print("Error: Debe proporcionar los directorios de entrada y salida cuando no se usa la GUI.")
-            return
-        input_dir = Path(args.input_dir).resolve() # Define el directorio de entrada
-        output_dir = Path(args.output_dir).resolve() # Define el directorio de salida
-
-        if not input_dir.is_dir():
-            print(f"Error: El directorio de entrada '{input_dir}' no existe o no es un directorio válido.")
-            return
-        
-        main_script(input_dir, output_dir) # Ejecutar el script normal
-
-
-if __name__ == "__main__":
-    main()
+"""
+Script para conversión masiva de audio y organización de archivos.
+
+Procesa recursivamente todos los archivos en un directorio de entrada, convirtiendo 
+archivos de audio (FLAC, WAV, OGG, M4A) al formato MP3 a 320 kbps mientras preserva 
+los metadatos originales. Los archivos que no son de audio (imágenes, documentos, 
+letras) se copian sin modificaciones. La estructura de carpetas original se replica 
+en el directorio de salida.
+
+* Características:
+    * Procesamiento paralelo mediante múltiples procesos para mayor rendimiento
+    * Barra de progreso con tiempo estimado de finalización
+    * Omisión automática de archivos ya procesados (salidas completas y más recientes que su origen)
+    * Registro detallado de conversiones, copias y errores en formato JSON Lines (NDJSON)
+"""
+
+# Primero importo las librerías necesarias
+import os # Para operaciones del sistema
+import shutil # Para copiar archivos
+import subprocess # Para llamar a ffmpeg
+import json # Para manejar archivos JSON
+import hashlib # Para calcular el hash del contenido de los archivos
+import time # Para medir tiempos
+from pathlib import Path # Para manejar rutas de archivos
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait # Para procesamiento paralelo
+from itertools import chain # Para encadenar iteradores
+import queue # Para comunicar las etapas del procesamiento
+import threading # Para ejecutar las etapas en paralelo
+from functools import lru_cache, partial # Para memorizar resultados y fijar argumentos de la función de trabajo
+from contextlib import contextmanager # Para abrir y cerrar juntos los logs de una ejecución
+import argparse # Para manejar argumentos de línea de comandos
+from typing import Callable, Iterable, Iterator, Literal, TextIO # Para anotaciones de tipos
+from datetime import datetime # Para manejar fechas y horas
+
+BASE_DIR = Path(__file__).resolve().parent # Directorio base del script
+LOGS_DIR = BASE_DIR / "logs" # Directorio para logs
+
+# -------------------- Configuración --------------------
+AUDIO_FORMATS = {".flac", ".wav", ".ogg", ".m4a"} # Formatos de audio a convertir
+
+timestamp = datetime.now().strftime("%d%m%Y_%H%M%S") # formato en ddmmyyyy_hhmmss.
+ERROR_LOG = LOGS_DIR / f"log_errors_{timestamp}.ndjson" # Archivo de log para errores (una línea JSON por error)
+CONVERTED_LOG = LOGS_DIR / f"log_converted_{timestamp}.ndjson" # Archivo de log para archivos convertidos
+COPIED_LOG = LOGS_DIR / f"log_copied_{timestamp}.ndjson" # Archivo de log para archivos copiados
+SUMMARY_LOG = LOGS_DIR / f"log_summary_{timestamp}.json" # Archivo de log para resumen
+CACHE_FILE = LOGS_DIR / "cache.json" # Manifiesto de conversiones por hash de contenido: {hash: {parametros: [ruta_mp3, tamaño, mtime_ns]}}
+FILE_ENTRIES = LOGS_DIR / "file_entries.json" # Descriptores (mtime_ns, tamaño) de los archivos ya procesados, por par entrada/salida
+
+CPU_CORES = os.cpu_count() or 2 # Número de núcleos de CPU para procesamiento paralelo (predeterminado a 2 si no se puede determinar)
+FFMPEG_THREADS = 1 # Hilos por proceso de ffmpeg (el paralelismo lo aporta el pool de procesos)
+ENCODERS = {"lame": "libmp3lame", "shine": "libshine"} # Codificadores MP3 admitidos (libshine: punto fijo, más rápido)
+DEFAULT_ENCODER = "lame" # Codificador predeterminado
+BITRATE = "320k" # Bitrate de salida
+COPY_WORKERS = min(32, CPU_CORES * 4) # Hilos para copiar archivos que no son de audio (limitados por E/S)
+
+# CONFIGURACIÓN PARA WINDOWS: Ocultar ventana de consola de ffmpeg (se prepara una sola vez)
+if os.name == 'nt':
+    _STARTUPINFO = subprocess.STARTUPINFO() # Crear objeto STARTUPINFO
+    _STARTUPINFO.dwFlags |= subprocess.STARTF_USESHOWWINDOW # Establecer bandera para ocultar ventana
+    _CREATIONFLAGS = subprocess.CREATE_NO_WINDOW # No crear consola para el proceso hijo
+else:
+    _STARTUPINFO = None
+    _CREATIONFLAGS = 0
+
+BATCH_SIZE = 16 # Máximo de archivos de un mismo directorio y formato por llamada a ffmpeg
+
+# Resultado de procesar un archivo: (estado, ruta_salida o (ruta_origen, error), hash_origen)
+ConversionResult = tuple[Literal["converted", "copied", "skipped", "error"], Path | tuple[Path, str], str | None]
+
+_conversion_cache: dict[str, dict[str, list]] = {} # Caché de conversiones visible en cada proceso
+_ffmpeg_path = "ffmpeg" # Ejecutable de ffmpeg (ruta absoluta tras _init_worker)
+
+# -------------------- Funciones --------------------
+def encoder_args(encoder: str = DEFAULT_ENCODER, quality: int | None = None) -> tuple[str, ...]:
+    """
+    Argumentos de ffmpeg para el codificador elegido.
+    quality (0-9) solo aplica a LAME: 0 es el algoritmo más lento y de mejor calidad, 9 el más rápido.
+    """
+    args = ("-c:a", ENCODERS[encoder], "-b:a", BITRATE)
+    if encoder == "lame" and quality is not None:
+        args += ("-compression_level", str(quality))
+    return args
+
+DEFAULT_CODEC_ARGS = encoder_args() # Argumentos de codificación predeterminados
+
+def cache_params(codec_args: tuple[str, ...]) -> str:
+    """
+    Clave de parámetros de codificación que identifica una conversión en la caché.
+    """
+    return " ".join(codec_args)
+
+@lru_cache(maxsize=None)
+def available_encoders() -> frozenset[str]:
+    """
+    Codificadores de audio disponibles en el ffmpeg instalado (se consulta una sola vez).
+    """
+    try:
+        result = subprocess.run(["ffmpeg", "-hide_banner", "-encoders"], stdin=subprocess.DEVNULL, capture_output=True,
+                                startupinfo=_STARTUPINFO, creationflags=_CREATIONFLAGS, check=False)
+    except OSError:
+        return frozenset() # ffmpeg no está instalado
+    # Las líneas de codificadores tienen la forma " A....D libmp3lame  descripción"
+    return frozenset(parts[1] for line in result.stdout.decode("utf-8", errors="replace").splitlines()
+                     if len(parts := line.split()) > 1 and parts[0].startswith("A"))
+
+def file_sha256(file_path: Path) -> str:
+    """
+    Calcula el hash SHA-256 del contenido de un archivo leyendo en bloques de 1 MiB.
+    """
+    with open(file_path, "rb") as f:
+        if hasattr(hashlib, "file_digest"): # Python 3.11+
+            return hashlib.file_digest(f, "sha256").hexdigest()
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+        return digest.hexdigest()
+
+def copy_file(src: Path | str, dst: Path | str) -> None:
+    """
+    Copia un archivo preservando sus metadatos (como shutil.copy2).
+    En Linux usa os.copy_file_range para que el kernel copie sin pasar los datos por Python
+    (y aproveche reflinks o copias del lado del servidor si el sistema de archivos las admite);
+    si no está disponible o falla (p. ej. EXDEV entre sistemas de archivos), usa shutil.copyfile.
+    """
+    copied = False # Indica si la copia rápida terminó
+    if hasattr(os, "copy_file_range"):
+        try:
+            with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                remaining = os.fstat(fsrc.fileno()).st_size # Bytes por copiar
+                while remaining > 0:
+                    sent = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                    if sent == 0:
+                        break # Fin de archivo antes de lo esperado
+                    remaining -= sent
+            copied = remaining == 0
+        except OSError:
+            copied = False # Volver a la copia estándar
+    if not copied:
+        shutil.copyfile(src, dst) # sendfile en Linux, copia por bloques en el resto
+    shutil.copystat(src, dst) # Preservar fechas y permisos
+
+def load_manifest(manifest_file: Path) -> dict:
+    """
+    Carga un manifiesto JSON de la carpeta de logs (vacío si no existe o está corrupto).
+    """
+    try:
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {} # Sin manifiesto previo o archivo corrupto
+
+def save_manifest(manifest_file: Path, data: dict) -> None:
+    """
+    Guarda un manifiesto JSON de forma atómica.
+    """
+    LOGS_DIR.mkdir(parents=True, exist_ok=True) # Crear directorio de logs si no existe
+    tmp_file = manifest_file.with_suffix(".json.tmp") # Archivo temporal
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(tmp_file, manifest_file) # Reemplazo atómico
+
+def load_cache() -> dict[str, dict[str, list]]:
+    """
+    Carga el manifiesto de conversiones {hash_origen: {parametros: [ruta_mp3, tamaño, mtime_ns]}}.
+    """
+    return load_manifest(CACHE_FILE)
+
+def save_cache(cache: dict[str, dict[str, list]]) -> None:
+    """
+    Guarda el manifiesto de conversiones.
+    """
+    save_manifest(CACHE_FILE, cache)
+
+def iter_files(root: Path | str) -> Iterator[str]:
+    """
+    Recorre recursivamente un directorio con os.scandir y genera las rutas (str) de sus archivos.
+    DirEntry reutiliza el tipo devuelto por el sistema al listar, evitando un stat() extra por entrada.
+    Igual que Path.rglob, no entra en enlaces simbólicos a directorios.
+    """
+    pending = [os.fspath(root)] # Directorios pendientes de recorrer
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        pending.append(entry.path) # Recorrer subdirectorio
+                    elif entry.is_file():
+                        yield entry.path
+        except OSError:
+            continue # Directorio ilegible: omitir como hace rglob
+
+def relative_path(path: str, root: Path | str) -> str:
+    """
+    Ruta relativa de un archivo generado por iter_files(root), sin construir objetos Path.
+    """
+    return path[len(os.path.join(os.fspath(root), "")):]
+
+def analyze_files(files: Iterable[str], input_dir: Path, entries: dict[str, list[int]], analyzed: dict, has_output: Callable[[str], bool], on_error: Callable[[str, str, OSError], None]) -> Iterator[tuple[str, str, list[int]]]:
+    """
+    Clasifica los archivos de entrada según los descriptores guardados en la ejecución anterior,
+    a medida que llegan. Genera (ruta, ruta_relativa, descriptor) de cada archivo a procesar y
+    va llenando analyzed = {"changed": n, "unchanged": n, "missing": [...]} (solo se cuentan los archivos,
+    sin guardar sus rutas):
+        - changed: archivos nuevos o modificados, o cuya salida ya no existe (se deben procesar).
+        - unchanged: archivos con el mismo (mtime_ns, tamaño) que la última vez y con su salida presente.
+        - missing: rutas relativas registradas que ya no existen (al agotar el generador).
+    has_output(ruta) indica si la salida esperada de un archivo existe (solo se consulta si no cambió).
+    on_error(ruta, ruta_relativa, excepción) recibe los archivos que no se pueden leer, sin detener la ejecución.
+    """
+    seen = set() # Rutas relativas encontradas en esta ejecución
+    for f in files:
+        rel = relative_path(f, input_dir) # Clave del manifiesto
+        seen.add(rel)
+        try:
+            st = os.stat(f) # Un solo stat por archivo
+        except OSError as e:
+            analyzed["changed"] += 1
+            on_error(f, rel, e) # Archivo borrado o sin permisos durante el recorrido
+            continue
+        descriptor = [st.st_mtime_ns, st.st_size]
+        if entries.get(rel) == descriptor and has_output(f):
+            analyzed["unchanged"] += 1
+        else:
+            analyzed["changed"] += 1
+            yield f, rel, descriptor
+    analyzed["missing"] = [rel for rel in entries if rel not in seen]
+
+def _init_worker(cache: dict[str, dict[str, list]]) -> None:
+    """
+    Inicializa cada proceso del pool con la caché de conversiones (de solo lectura).
+    También resuelve una sola vez la ruta de ffmpeg para no buscarlo en el PATH en cada llamada.
+    """
+    global _conversion_cache, _ffmpeg_path
+    _conversion_cache = cache
+    _ffmpeg_path = shutil.which("ffmpeg") or "ffmpeg"
+
+def _output_complete(out_file: str, descriptor: list[int], same_size: bool = False) -> bool:
+    """
+    Comprueba con un solo stat() si una salida existente está completa: no vacía (o del mismo
+    tamaño que el origen si same_size) y no más antigua que el origen, según su descriptor
+    (mtime_ns, tamaño). Así una salida parcial de una ejecución interrumpida no se da por buena.
+    """
+    src_mtime_ns, src_size = descriptor
+    try:
+        st = os.stat(out_file)
+    except FileNotFoundError:
+        return False
+    size_ok = st.st_size == src_size if same_size else st.st_size > 0
+    return size_ok and st.st_mtime_ns >= src_mtime_ns
+
+def cached_output(src_hash: str, codec_args: tuple[str, ...]) -> str | None:
+    """
+    Ruta de un MP3 ya codificado a partir del mismo contenido y parámetros, solo si sigue siendo
+    el archivo registrado: mismo tamaño y fecha que al convertirlo. Si otra conversión lo
+    sobrescribió desde entonces, la entrada ya no es válida y se ignora.
+    """
+    entry = _conversion_cache.get(src_hash, {}).get(cache_params(codec_args))
+    if not isinstance(entry, list) or len(entry) != 3:
+        return None # Sin conversión previa (o entrada de un formato anterior, sin verificar)
+    cached, size, mtime_ns = entry
+    try:
+        st = os.stat(cached)
+    except OSError:
+        return None
+    return cached if (st.st_size, st.st_mtime_ns) == (size, mtime_ns) else None
+
+def output_path(file_path: str, input_dir: Path, output_dir: Path) -> str:
+    """
+    Ruta de salida que replica la ubicación de un archivo de entrada (antes de cambiar la extensión).
+    """
+    return os.path.join(os.fspath(output_dir), relative_path(file_path, input_dir))
+
+def expected_output(file_path: str, input_dir: Path, output_dir: Path) -> str:
+    """
+    Ruta final de la salida de un archivo de entrada (con extensión .mp3 si es de audio).
+    """
+    out_file = output_path(file_path, input_dir, output_dir)
+    base, ext = os.path.splitext(out_file)
+    return base + ".mp3" if ext.lower() in AUDIO_FORMATS else out_file
+
+def prepare_file(file_path: str, out_file: str, descriptor: list[int], codec_args: tuple[str, ...] = DEFAULT_CODEC_ARGS) -> tuple[str, str | None, ConversionResult | None]:
+    """
+    Prepara un archivo antes de codificarlo: copia los que no son de audio y resuelve
+    las omisiones y la caché de los de audio. El directorio de salida ya debe existir.
+    descriptor es el (mtime_ns, tamaño) del origen obtenido al clasificarlo, para no volver a leerlo.
+    Trabaja con rutas str (sin objetos Path) porque se ejecuta una vez por archivo.
+    Retorna (ruta_salida, hash_origen, resultado); resultado es None si hay que ejecutar ffmpeg.
+    """
+    ext = os.path.splitext(file_path)[1].lower() # Extensión del archivo de origen
+
+    # Copiar otros archivos
+    if ext not in AUDIO_FORMATS:
+        # Omitir si la copia ya existe y está completa (copy_file conserva la fecha del origen)
+        if not _output_complete(out_file, descriptor, same_size=True):
+            copy_file(file_path, out_file) # Copiar archivo preservando metadatos
+        return out_file, None, ("copied", Path(out_file), None) # Retornar éxito de copia
+
+    # Cambiar la extensión a .mp3
+    out_file = os.path.splitext(out_file)[0] + ".mp3"
+    # Omitir si el MP3 ya existe y está completo
+    if _output_complete(out_file, descriptor):
+        return out_file, None, ("skipped", Path(out_file), None) # Archivo ya procesado
+
+    # Reutilizar una conversión previa del mismo contenido (p. ej. tras renombrar un álbum)
+    src_hash = file_sha256(file_path)
+    cached = cached_output(src_hash, codec_args)
+    if cached:
+        part_file = out_file + ".part" # Copia temporal: un MP3 a medias nunca queda con su nombre final
+        copy_file(cached, part_file) # Copiar el MP3 ya codificado
+        os.replace(part_file, out_file)
+        os.utime(out_file) # Fecha actual: la copia conserva la del MP3 original, que puede ser anterior al origen
+        return out_file, None, ("converted", Path(out_file), None)
+    return out_file, src_hash, None # Hay que convertir con ffmpeg
+
+def run_ffmpeg(jobs: list[tuple[Path | str, Path | str]], ffmpeg_threads: int = FFMPEG_THREADS, codec_args: tuple[str, ...] = DEFAULT_CODEC_ARGS) -> None:
+    """
+    Convierte uno o varios archivos (origen, destino) a MP3 en una sola llamada a ffmpeg.
+    Con varios archivos, cada entrada i se asigna a su salida con -map i y -map_metadata i.
+    ffmpeg escribe en archivos .part que se renombran al terminar, así una salida interrumpida
+    nunca queda con el nombre final. Lanza RuntimeError si ffmpeg falla (sin dejar salidas).
+    """
+    threads = str(ffmpeg_threads) # Hilos por entrada y salida
+    cmd = [_ffmpeg_path, "-y", "-loglevel", "error", "-nostats"] # Comando ffmpeg (sobrescribir salidas, solo errores)
+    for src, _ in jobs:
+        cmd += ["-threads", threads, "-i", str(src)] # Entradas
+    for i, (_, dst) in enumerate(jobs):
+        # Con una sola entrada se deja que ffmpeg elija los streams; con varias, el audio y la portada de la entrada i
+        streams = ["-map", f"{i}:a:0", "-map", f"{i}:v:0?"] if len(jobs) > 1 else []
+        cmd += streams + ["-threads", threads, *codec_args, "-map_metadata", str(i), "-f", "mp3", f"{dst}.part"] # Salidas temporales
+
+    # Ejecutar ffmpeg para convertir los archivos
+    result = subprocess.run(
+        cmd, # Comando ffmpeg
+        stdin=subprocess.DEVNULL, # Sin entrada interactiva
+        stdout=subprocess.DEVNULL, # Descartar salida estándar
+        stderr=subprocess.PIPE, # Capturar solo los errores (en bytes)
+        startupinfo=_STARTUPINFO, # Usar configuración para ocultar ventana en Windows
+        creationflags=_CREATIONFLAGS, # Sin ventana de consola en Windows
+        check=False # El código de salida se revisa manualmente
+    )
+    # Si hay un error en la conversión, registrar el error (solo entonces se decodifica la salida)
+    if result.returncode != 0:
+        for _, dst in jobs:
+            try:
+                os.remove(f"{dst}.part") # Descartar salidas parciales
+            except FileNotFoundError:
+                pass
+        raise RuntimeError(result.stderr.decode("utf-8", errors="replace")) # Lanzar excepción con el error
+    for _, dst in jobs:
+        os.replace(f"{dst}.part", dst) # Publicar las salidas completas
+
+def encode_file(file_path: str, out_file: str, src_hash: str | None, ffmpeg_threads: int = FFMPEG_THREADS, codec_args: tuple[str, ...] = DEFAULT_CODEC_ARGS) -> ConversionResult:
+    """
+    Convierte con ffmpeg un archivo ya preparado por prepare_file (sin volver a calcular su hash).
+    Retorna (estado, datos, hash_origen).
+    """
+    try:
+        run_ffmpeg([(file_path, out_file)], ffmpeg_threads, codec_args) # Convertir con ffmpeg
+        return "converted", Path(out_file), src_hash # Retornar éxito de conversión
+    # Manejar excepciones y registrar errores
+    except Exception as e:
+        return "error", (Path(file_path), str(e)), None # Retornar error con detalles
+
+def convert_batch(jobs: list[tuple[str, str, list[int]]], ffmpeg_threads: int = FFMPEG_THREADS, codec_args: tuple[str, ...] = DEFAULT_CODEC_ARGS) -> list[ConversionResult]:
+    """
+    Procesa un lote de trabajos (origen, salida, descriptor) del mismo directorio y formato, codificando todos los
+    que lo necesiten en una sola llamada a ffmpeg para amortizar el arranque del proceso.
+    Si la llamada conjunta falla, se reintenta archivo por archivo para que un archivo
+    dañado no invalide al resto del lote.
+    """
+    results: list[ConversionResult | None] = [None] * len(jobs) # Resultados en el orden del lote
+    pending = [] # (índice, origen, destino, hash) de los archivos a codificar
+    for i, (file_path, dst, descriptor) in enumerate(jobs):
+        try:
+            out_file, src_hash, result = prepare_file(file_path, dst, descriptor, codec_args)
+        except Exception as e:
+            result = ("error", (Path(file_path), str(e)), None)
+        if result is not None:
+            results[i] = result
+        else:
+            pending.append((i, file_path, out_file, src_hash))
+
+    if len(pending) == 1:
+        i, file_path, out_file, src_hash = pending[0]
+        results[i] = encode_file(file_path, out_file, src_hash, ffmpeg_threads, codec_args) # Un solo archivo a codificar
+    elif pending:
+        try:
+            run_ffmpeg([(src, dst) for _, src, dst, _ in pending], ffmpeg_threads, codec_args) # Codificar el lote completo
+            for i, _, out_file, src_hash in pending:
+                results[i] = ("converted", Path(out_file), src_hash)
+        except Exception:
+            # Convertir cada archivo por separado (run_ffmpeg ya descartó las salidas parciales)
+            for i, file_path, out_file, src_hash in pending:
+                results[i] = encode_file(file_path, out_file, src_hash, ffmpeg_threads, codec_args)
+    return results
+
+def iter_batches(jobs: Iterable[tuple], batch_size: int, max_workers: int) -> Iterator[list[tuple]]:
+    """
+    Agrupa los trabajos (origen, salida, ...) por directorio y extensión de origen en lotes de hasta
+    batch_size archivos, a medida que llegan. iter_files produce juntos los archivos de cada
+    directorio, así que los grupos se cierran al cambiar de directorio. Ningún lote supera
+    seen // max_workers archivos (seen = trabajos vistos): mientras hay pocos trabajos frente a los
+    procesos se envían de uno en uno, para que cada proceso reciba trabajo en lugar de acumularlo en un lote.
+    """
+    groups: dict[str, list[tuple]] = {} # Trabajos del directorio actual por extensión
+    current_dir = None # Directorio que se está agrupando
+    seen = 0 # Trabajos recibidos hasta ahora
+
+    def limit() -> int:
+        return max(1, min(batch_size, seen // max_workers)) # No dejar procesos sin trabajo
+
+    def flush():
+        size = limit()
+        for group in groups.values():
+            for i in range(0, len(group), size):
+                yield group[i:i + size]
+        groups.clear()
+
+    for job in jobs:
+        parent, name = os.path.split(job[0])
+        if parent != current_dir:
+            yield from flush() # Directorio terminado
+            current_dir = parent
+        seen += 1
+        group = groups.setdefault(os.path.splitext(name)[1].lower(), [])
+        group.append(job)
+        if len(group) >= limit():
+            yield group[:] # Lote completo (con el mismo límite que al cerrar el directorio)
+            group.clear()
+    yield from flush()
+
+def new_run(input_dir: Path, output_dir: Path) -> dict:
+    """
+    Estado de una ejecución compartido por la consola y la GUI: caché de conversiones,
+    descriptores de la ejecución anterior (solo valen para el mismo par entrada/salida),
+    clasificación de los archivos de entrada, descriptores procesados y contadores.
+    """
+    all_entries = load_manifest(FILE_ENTRIES) # Descriptores de ejecuciones anteriores
+    return {
+        "cache": load_cache(), # Caché de conversiones por hash de contenido
+        "all_entries": all_entries,
+        "entries": all_entries.setdefault(f"{input_dir} -> {output_dir}", {}), # Descriptores de este par entrada/salida
+        "analyzed": {"changed": 0, "unchanged": 0, "missing": []}, # Clasificación de los archivos de entrada (contadores y rutas eliminadas)
+        "processed": {}, # Descriptores de los archivos procesados en esta ejecución
+        "counts": {"converted": 0, "copied": 0, "skipped": 0, "error": 0}, # Contadores de resultados
+        "start_time": time.time(), # Tiempo de inicio
+    }
+
+def iter_results(files: Iterable[str], input_dir: Path, output_dir: Path, run: dict, max_workers: int | None = None, ffmpeg_threads: int = FFMPEG_THREADS, batch_size: int = BATCH_SIZE, codec_args: tuple[str, ...] = DEFAULT_CODEC_ARGS) -> Iterator[tuple[list[tuple], list[ConversionResult], int]]:
+    """
+    Procesa los archivos de entrada y genera, por cada lote terminado y en el orden en que terminan,
+    (trabajos, resultados, total_enviado).
+    Cada trabajo es (origen, salida, ruta_relativa, descriptor). Las etapas corren en paralelo:
+    un hilo recorre la entrada, otro decide qué procesar, crea los directorios de salida y envía
+    lotes (audio a procesos, copias a hilos), y quien consume el generador recibe los resultados.
+    total_enviado crece mientras avanza el recorrido.
+    """
+    # Repartir los núcleos entre procesos para no saturar la CPU con hilos de ffmpeg
+    if max_workers is None:
+        max_workers = max(1, CPU_CORES // ffmpeg_threads)
+
+    _init_worker(run["cache"]) # Los hilos de copia usan el estado del proceso principal
+
+    # Etapas unidas por colas acotadas: recorrido -> clasificación y envío -> resultados
+    paths_q = queue.Queue(maxsize=4 * CPU_CORES) # Rutas encontradas
+    results_q = queue.Queue(maxsize=4 * CPU_CORES) # Lotes enviados con su future
+    stage_errors = [] # Excepciones de los hilos de las etapas
+    queued = [0] # Archivos enviados a los pools hasta ahora
+    stop = threading.Event() # Se activa cuando nadie va a leer más de las colas (fallo del envío o generador cerrado)
+
+    # Encolar sin quedar bloqueado para siempre en una cola llena: False si se detuvieron las etapas
+    def put(q: queue.Queue, item) -> bool:
+        while not stop.is_set():
+            try:
+                q.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    # Etapa 1: recorrer el directorio de entrada
+    def scan() -> None:
+        try:
+            for f in files:
+                if not put(paths_q, f):
+                    return # El envío terminó: nadie leerá más rutas
+        except BaseException as e:
+            stage_errors.append(e)
+        finally:
+            put(paths_q, None) # Fin del recorrido
+
+    def queued_paths() -> Iterator[str]:
+        while (f := paths_q.get()) is not None:
+            yield f
+
+    # Etapa 2: decidir qué procesar, crear directorios de salida y enviar lotes a los pools
+    def dispatch(executor: ProcessPoolExecutor, copier: ThreadPoolExecutor) -> None:
+        try:
+            created_dirs = set() # Directorios de salida ya creados (uno por álbum, no uno por archivo)
+
+            def jobs() -> Iterator[tuple[str, str, str, list[int]]]:
+                listing = [None, set()] # Último directorio de salida listado y sus archivos
+
+                # Reprocesar si se borró la salida. Los archivos llegan agrupados por directorio, así que
+                # cada directorio de salida se lista una sola vez y solo cuando hace falta, sin recorrer antes toda la salida.
+                def has_output(f: str) -> bool:
+                    out_dir, name = os.path.split(expected_output(f, input_dir, output_dir))
+                    if listing[0] != out_dir:
+                        try:
+                            names = set(os.listdir(out_dir))
+                        except OSError:
+                            names = set() # Directorio de salida inexistente
+                        listing[:] = [out_dir, names]
+                    return name in listing[1]
+
+                # Un archivo ilegible se entrega directamente como error, como si viniera de un lote
+                def report_error(f: str, rel: str, e: OSError) -> None:
+                    future = Future()
+                    future.set_result([("error", (Path(f), str(e)), None)])
+                    queued[0] += 1
+                    put(results_q, ([(f, None, rel, None)], future))
+
+                for f, rel, descriptor in analyze_files(queued_paths(), input_dir, run["entries"], run["analyzed"], has_output, report_error):
+                    out = output_path(f, input_dir, output_dir) # Ruta de salida
+                    out_dir = os.path.dirname(out)
+                    if out_dir not in created_dirs:
+                        os.makedirs(out_dir, exist_ok=True)
+                        created_dirs.add(out_dir)
+                    yield f, out, rel, descriptor
+
+            worker = partial(convert_batch, ffmpeg_threads=ffmpeg_threads, codec_args=codec_args) # Fijar hilos y codificador de ffmpeg
+            for batch in iter_batches(jobs(), batch_size, max_workers):
+                # Conversiones en procesos independientes; copias en hilos, que solo esperan al disco
+                is_audio = os.path.splitext(batch[0][0])[1].lower() in AUDIO_FORMATS
+                pool = executor if is_audio else copier
+                future = pool.submit(worker, [(src, out, descriptor) for src, out, _, descriptor in batch])
+                queued[0] += len(batch)
+                put(results_q, (batch, future))
+        except BaseException as e:
+            stage_errors.append(e)
+        finally:
+            put(results_q, None) # Fin de los envíos
+            stop.set() # Si el envío falló, liberar al recorrido, que puede estar esperando en paths_q
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(run["cache"],)) as executor, \
+         ThreadPoolExecutor(max_workers=COPY_WORKERS) as copier:
+        stages = [threading.Thread(target=scan, daemon=True), threading.Thread(target=dispatch, args=(executor, copier), daemon=True)]
+        for stage in stages:
+            stage.start()
+
+        try:
+            # Etapa 3: entregar los resultados de cada lote a medida que terminan (no en el orden de envío,
+            # así un lote lento no retiene a los demás ni, al llenarse results_q, al envío)
+            pending = {} # Lotes en curso: future -> trabajos
+            sending = True # El envío aún puede mandar lotes
+            while sending or pending:
+                # Recibir los lotes enviados; solo se espera en la cola si no hay ninguno en curso
+                try:
+                    while sending:
+                        item = results_q.get(block=not pending)
+                        if item is None:
+                            sending = False
+                        else:
+                            pending[item[1]] = item[0]
+                except queue.Empty:
+                    pass
+                if pending:
+                    # Con timeout para volver a recibir los lotes enviados mientras tanto
+                    done, _ = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield pending.pop(future), future.result(), queued[0]
+        finally:
+            stop.set() # Detener las etapas también si se deja de consumir el generador
+
+        if not stage_errors:
+            for stage in stages:
+                stage.join()
+    if stage_errors:
+        raise stage_errors[0] # Propagar errores del recorrido o del envío
+
+@contextmanager
+def open_logs() -> Iterator[dict[str, TextIO]]:
+    """
+    Abre los logs NDJSON de convertidos, copiados y errores. Cada resultado se escribe al momento
+    (una línea JSON por archivo) con un búfer grande, así la memoria no crece con el número de
+    archivos y lo ya procesado queda registrado si se interrumpe.
+    """
+    LOGS_DIR.mkdir(parents=True, exist_ok=True) # Crear directorio de logs si no existe
+    with open(CONVERTED_LOG, "w", encoding="utf-8", buffering=1 << 20) as converted_log, \
+         open(COPIED_LOG, "w", encoding="utf-8", buffering=1 << 20) as copied_log, \
+         open(ERROR_LOG, "w", encoding="utf-8", buffering=1 << 20) as error_log:
+        yield {"converted": converted_log, "copied": copied_log, "error": error_log}
+
+def record_results(run: dict, batch: list[tuple], results: list[ConversionResult], logs: dict[str, TextIO], codec_args: tuple[str, ...] = DEFAULT_CODEC_ARGS) -> None:
+    """
+    Cuenta y registra en los logs los resultados de un lote, y anota las conversiones nuevas
+    en la caché y los descriptores de los archivos procesados.
+    """
+    for (_, _, rel, descriptor), (status, result_data, src_hash) in zip(batch, results):
+        run["counts"][status] += 1 # Contar resultado
+        # Registrar resultados según el estado
+        if status == "error":
+            f_path, error_msg = result_data if isinstance(result_data, tuple) else (result_data, "Error desconocido")
+            logs["error"].write(json.dumps({"file": f_path.name, "error": error_msg}, ensure_ascii=False) + "\n") # Registrar error
+        else:
+            if status in logs:
+                logs[status].write(json.dumps({"file": str(result_data)}, ensure_ascii=False) + "\n") # Registrar archivo
+            if src_hash:
+                # Registrar conversión en caché junto con el tamaño y la fecha del MP3 para verificarlo al reutilizarlo
+                try:
+                    st = os.stat(result_data)
+                    run["cache"].setdefault(src_hash, {})[cache_params(codec_args)] = [str(result_data), st.st_size, st.st_mtime_ns]
+                except OSError:
+                    pass # Salida desaparecida: no se registra
+            run["processed"][rel] = descriptor # Registrar descriptor del archivo procesado
+
+def finish_run(run: dict) -> dict:
+    """
+    Actualiza los descriptores, guarda la caché y el manifiesto, y escribe el resumen en JSON
+    (el detalle por archivo está en los logs NDJSON). Retorna el resumen.
+    """
+    # Actualizar descriptores: descartar archivos eliminados y registrar los procesados
+    entries = run["entries"]
+    for rel in run["analyzed"]["missing"]:
+        del entries[rel]
+    entries.update(run["processed"])
+
+    save_cache(run["cache"]) # Guardar caché de conversiones
+    save_manifest(FILE_ENTRIES, run["all_entries"]) # Guardar descriptores de archivos procesados
+
+    # Calcular tiempos y totales
+    counts = run["counts"]
+    elapsed_total = time.time() - run["start_time"]
+    total_tracks = counts["converted"] + counts["copied"] + counts["error"] # Total de archivos procesados
+
+    summary = {
+        "converted": counts["converted"],
+        "copied": counts["copied"],
+        "skipped": counts["skipped"],
+        "failed": counts["error"],
+        "converted_log": str(CONVERTED_LOG),
+        "copied_log": str(COPIED_LOG),
+        "errors_log": str(ERROR_LOG),
+        "total_files_processed": total_tracks,
+        "total_time_sec": int(elapsed_total),
+        "average_speed_tracks_per_sec": round(total_tracks / elapsed_total, 2) if elapsed_total > 0 else 0
+    }
+    with open(SUMMARY_LOG, "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2, ensure_ascii=False) # Guardar resumen en JSON
+    return summary
+
+# -------------------- Main --------------------
+
+# Script normal.
+def main_script(input_dir: Path, output_dir: Path, max_workers: int | None = None, ffmpeg_threads: int = FFMPEG_THREADS, batch_size: int = BATCH_SIZE, codec_args: tuple[str, ...] = DEFAULT_CODEC_ARGS) -> None:
+    """
+    Función principal para procesar todos los archivos en el directorio de entrada.
+    1. Recorre el directorio de entrada mientras se deciden y envían lotes (iter_results),
+       de modo que las primeras conversiones empiezan sin esperar al recorrido completo.
+    2. Procesa en paralelo (un proceso por worker) lotes de archivos del mismo directorio y formato,
+       convirtiendo o copiando según corresponda.
+    3. Muestra una barra de progreso con velocidad y ETA.
+    4. Registra cada resultado en logs NDJSON y guarda un resumen al finalizar.
+    5. Imprime la ubicación de los archivos procesados y los logs.
+    """
+
+    #importo las librerías necesarias
+    try:
+        from tqdm import tqdm # Para la barra de progreso
+    except ImportError:
+        print("Error: Necesitas instalar 'tqdm' para usar el modo consola.")
+        return
+    
+    # Recorrido perezoso de todos los archivos de todos los álbumes
+    files = iter_files(input_dir)
+    first_file = next(files, None) # Comprobar que hay algo que procesar
+    if first_file is None:
+        print("No se encontraron archivos para procesar en el directorio de entrada.")
+        return
+
+    run = new_run(input_dir, output_dir) # Estado de la ejecución
+    results = iter_results(chain([first_file], files), input_dir, output_dir, run, max_workers, ffmpeg_threads, batch_size, codec_args)
+
+    # Recoger resultados con barra de progreso (el total crece mientras avanza el recorrido)
+    bar_format = "{l_bar}{bar}| {n_fmt}/{total_fmt} [{elapsed}<{remaining}, {rate_fmt}]" # Velocidad y ETA de tqdm
+    with open_logs() as logs, \
+         tqdm(total=0, desc="Procesando archivos", unit="archivo", dynamic_ncols=True, bar_format=bar_format) as pbar:
+        for batch, batch_results, queued in results:
+            record_results(run, batch, batch_results, logs, codec_args) # Contar y registrar resultados
+            # Actualizar barra de progreso una vez por lote (tqdm calcula velocidad y ETA)
+            pbar.total = queued
+            pbar.update(len(batch))
+
+    finish_run(run) # Guardar caché, descriptores y resumen
+
+    if not run["analyzed"]["changed"]:
+        print("No hay archivos nuevos o modificados desde la última ejecución.")
+
+    print(f"\nProceso completado. Archivos en: {output_dir}")
+    print(f"Resumen guardado en: {SUMMARY_LOG}")
+    print(f"Errores guardados en: {ERROR_LOG}")
+
+# Script con GUI:
+def main_with_gui() -> None:
+    """
+    Función principal para procesar todos los archivos en el directorio de entrada con GUI.
+    Similar a la función main(), pero con una interfaz gráfica hecha en PyQt6.
+    """
+    # primero se importan las librerías necesarias para la GUI
+    try:
+        from PyQt6.QtWidgets import QApplication, QWidget, QVBoxLayout, QPushButton, QFileDialog, QTextEdit, QProgressBar
+        from PyQt6.QtCore import QThread, pyqtSignal
+    except ImportError:
+        print("Error: Necesitas instalar 'PyQt6' para usar la interfaz gráfica.")
+        return
+
+    # Clase para el hilo de procesamiento
+    class WorkerThread(QThread):
+        progress = pyqtSignal(int) # Señal para actualizar progreso
+        log = pyqtSignal(str) # Señal para enviar logs
+        finished = pyqtSignal() # Señal para indicar finalización
+
+        # Constructor
+        def __init__(self, input_dir, output_dir):
+            super().__init__() # Inicializar QThread
+            self.input_dir = Path(input_dir) # Directorio de entrada
+            self.output_dir = Path(output_dir) # Directorio de salida
+
+        # Método para ejecutar el hilo
+        def run(self):
+            # Recorrido perezoso de todos los archivos de todos los álbumes
+            files = iter_files(self.input_dir)
+            first_file = next(files, None) # Comprobar que hay algo que procesar
+            if first_file is None:
+                self.log.emit("No se encontraron archivos para procesar en el directorio de entrada.")
+                self.finished.emit()
+                return
+
+            run = new_run(self.input_dir, self.output_dir) # Estado de la ejecución
+            done = 0 # Archivos terminados
+
+            # Mismo procesamiento que el modo consola; aquí los resultados se envían como señales
+            with open_logs() as logs:
+                for batch, batch_results, queued in iter_results(chain([first_file], files), self.input_dir, self.output_dir, run):
+                    record_results(run, batch, batch_results, logs) # Contar y registrar resultados
+                    # Enviar logs según el estado
+                    for status, result_data, _ in batch_results:
+                        if status == "error":
+                            f_path, error_msg = result_data if isinstance(result_data, tuple) else (result_data, "Unknown error")
+                            self.log.emit(f"Error al procesar {f_path.name}: {error_msg}") # Enviar log de error
+                        else:
+                            labels = {"converted": "Convertido", "copied": "Copiado", "skipped": "Omitido"}
+                            self.log.emit(f"{labels[status]}: {result_data.name}") # Enviar log de éxito
+
+                    done += len(batch)
+                    self.progress.emit(int(done / queued * 100)) # Actualizar progreso (el total crece durante el recorrido)
+
+            summary = finish_run(run) # Guardar caché, descriptores y resumen
+            if not run["analyzed"]["changed"]:
+                self.log.emit("No hay archivos nuevos o modificados desde la última ejecución.")
+            self.log.emit(f"Proceso completado en {summary['total_time_sec']} segundos.") # Enviar log de finalización
+            self.log.emit(f"Errores guardados en: {ERROR_LOG}") # Indicar ubicación del log de errores
+            self.log.emit(f"Resumen guardado en: {SUMMARY_LOG}") # Indicar ubicación del resumen
+
+            self.finished.emit() # Emitir señal de finalización
+        
+    # Clase para la ventana principal
+    class MainWindow(QWidget):
+        def __init__(self):
+            super().__init__()
+            self.setWindowTitle("Conversión Masiva de Audio a MP3")
+            self.setGeometry(100, 100, 600, 400)
+
+            main_layout = QVBoxLayout()
+
+            self.input_button = QPushButton("Seleccionar Directorio de Entrada")
+            self.input_button.clicked.connect(self.select_input_directory)
+            main_layout.addWidget(self.input_button)
+
+            self.output_button = QPushButton("Seleccionar Directorio de Salida")
+            self.output_button.clicked.connect(self.select_output_directory)
+            main_layout.addWidget(self.output_button)
+
+            self.start_button = QPushButton("Iniciar Procesamiento")
+            self.start_button.clicked.connect(self.start_processing)
+            main_layout.addWidget(self.start_button)
+
+            self.progress_bar = QProgressBar()
+            main_layout.addWidget(self.progress_bar)
+
+            self.log_text = QTextEdit()
+            self.log_text.setReadOnly(True)
+            main_layout.addWidget(self.log_text)
+
+            self.setLayout(main_layout)
+
+            self.input_dir = ""
+            self.output_dir = ""
+            self.worker_thread = None
+
+        def select_input_directory(self):
+            dir_path = QFileDialog.getExistingDirectory(self, "Seleccionar Directorio de Entrada")
+            if dir_path:
+                self.input_dir = dir_path
+                self.log_text.append(f"Directorio de entrada seleccionado: {dir_path}")
+
+        def select_output_directory(self):
+            dir_path = QFileDialog.getExistingDirectory(self, "Seleccionar Directorio de Salida")
+            if dir_path:
+                self.output_dir = dir_path
+                self.log_text.append(f"Directorio de salida seleccionado: {dir_path}")
+
+        def start_processing(self):
+            if not self.input_dir or not self.output_dir:
+                self.log_text.append("Por favor, seleccione ambos directorios antes de iniciar.")
+                return
+
+            self.worker_thread = WorkerThread(self.input_dir, self.output_dir)
+            self.worker_thread.progress.connect(self.update_progress)
+            self.worker_thread.log.connect(self.append_log)
+            self.worker_thread.finished.connect(self.processing_finished)
+            self.worker_thread.start()
+            self.log_text.append("Procesamiento iniciado...")
+
+        def update_progress(self, value):
+            self.progress_bar.setValue(value)
+
+        def append_log(self, message):
+            self.log_text.append(message)
+
+        def processing_finished(self):
+            self.log_text.append("Procesamiento finalizado.")
+    
+    import sys # Importar sys para la aplicación GUI
+    # Iniciar la aplicación GUI
+    app = QApplication([])
+    window = MainWindow()
+    window.show()
+    sys.exit(app.exec())
+
+#main
+def main() -> None:
+    """
+    Función principal para decidir si ejecutar el script normal o con GUI.
+    Parametros:
+        - gui: Booleano que indica si se debe usar la GUI o no.
+        - input_dir: Directorio de entrada si no se usa GUI.
+        - output_dir: Directorio de salida si no se usa GUI.
+    """
+    parser = argparse.ArgumentParser(description="Conversión masiva de audio y organización de archivos.") # Configurar el parser de argumentos
+    parser.add_argument("--gui", action="store_true", help="Usar interfaz gráfica.") # Argumento para usar GUI
+    parser.add_argument("--input_dir", type=str, nargs="?", help="Directorio de entrada con archivos a procesar.") # Argumento para el directorio de entrada
+    parser.add_argument("--output_dir", type=str, nargs="?", help="Directorio de salida para archivos procesados.") # Argumento para el directorio de salida
+    parser.add_argument("--max-workers", type=int, default=None, help="Número de procesos en paralelo (por defecto núcleos / hilos de ffmpeg).") # Argumento para el número de procesos
+    parser.add_argument("--ffmpeg-threads", type=int, default=FFMPEG_THREADS, help="Hilos que usa cada proceso de ffmpeg.") # Argumento para los hilos de ffmpeg
+    parser.add_argument("--encoder", choices=sorted(ENCODERS), default=DEFAULT_ENCODER, help="Codificador MP3 (shine es más rápido si ffmpeg lo incluye).") # Argumento para el codificador
+    parser.add_argument("--quality", type=int, choices=range(10), default=None, help="Calidad del algoritmo de LAME: 0 más lento y mejor, 9 más rápido.") # Argumento para la calidad de LAME
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Máximo de archivos del mismo álbum y formato por llamada a ffmpeg (1 desactiva la agrupación).") # Argumento para el tamaño de los lotes de ffmpeg
+    args = parser.parse_args() # Parsear los argumentos
+
+    # Si existe el argumento --gui, ejecutar con GUI
+    if args.gui:
+        main_with_gui() # Ejecutar con GUI
+    # Sino, ejecutar el script normal
+    else:
+        if not args.input_dir or not args.output_dir:
+            print("Error: Debe proporcionar los directorios de entrada y salida cuando no se usa la GUI.")
+            return
+        input_dir = Path(args.input_dir).resolve() # Define el directorio de entrada
+        output_dir = Path(args.output_dir).resolve() # Define el directorio de salida
+
+        if not input_dir.is_dir():
+            print(f"Error: El directorio de entrada '{input_dir}' no existe o no es un directorio válido.")
+            return
+        
+        ffmpeg_threads = max(1, args.ffmpeg_threads) # Al menos un hilo por proceso de ffmpeg
+        max_workers = max(1, args.max_workers) if args.max_workers else None # Número de procesos (automático si se omite)
+        # Usar libshine solo si el ffmpeg instalado lo incluye
+        encoder = args.encoder
+        if encoder != DEFAULT_ENCODER and ENCODERS[encoder] not in available_encoders():
+            print(f"Aviso: ffmpeg no incluye {ENCODERS[encoder]}; se usará {ENCODERS[DEFAULT_ENCODER]}.")
+            encoder = DEFAULT_ENCODER
+        codec_args = encoder_args(encoder, args.quality) # Argumentos del codificador elegido
+
+        main_script(input_dir, output_dir, max_workers, ffmpeg_threads, max(1, args.batch_size), codec_args) # Ejecutar el script normal
+
+
+if __name__ == "__main__":
+    main()
@@ -1,365 +1,646 @@
-"""
-Script para generar un resumen de metadatos de archivos de audio en un directorio específico y opcionalmente usar IA para análisis adicional.
-"""
-
-# Importaciones necesarias
-import os # Para operaciones del sistema
-import argparse # Para manejar argumentos de línea de comandos
-from pathlib import Path # Para manejar rutas de archivos
-from typing import Optional # Para anotaciones de tipos opcionales
-
-BASE_DIR = Path(__file__).resolve().parent # Directorio base del script
-SUMMARY_DIR = BASE_DIR / "summary" # Directorio para los resúmenes
-
-# Función que extrae metadatos de un archivo de audio
-def get_audio_metadata(filepath):
-
-    """Extrae metadatos a un archivo de audio usando mutagen."""
-
-    try:
-        from mutagen._file import File # Para manejar metadatos de audio
-    except ImportError:
-        print("Por favor, instála el archivo requirements.txt")
-        return None
-
-    # Intentar leer el archivo de audio
-    try:
-        audio = File(filepath, easy=False) # Cargar con mutagen
-        # Si no se pudo leer, retornar None
-        if audio is None:
-            return None
-        
-        tags = audio.tags or {} # Obtener etiquetas, manejar None
-
-        # Función auxiliar para obtener el valor de una etiqueta
-        def get_tag(keys):
-
-            # Probar varias claves posibles para cada campo
-            for key in keys:
-                # Verificar si la clave existe en las etiquetas
-                if key in tags:
-                    # Obtener el valor de la etiqueta
-                    val = tags.get(key)
-                    # Sí val es un objeto con atributo 'text' (como en ID3), manejarlo
-                    if val and hasattr(val, 'text'):
-                        # Sí val es una lista, retornar el primer elemento
-                        if isinstance(val.text, list) and val.text:
-                            return str(val.text[0])
-                    # Si val es una lista, retornar el primer elemento
-                    elif isinstance(val, list):
-                        if val:
-                            return str(val[0])
-                    # Si val es un valor simple, retornarlo como cadena
-                    elif val:
-                        return str(val)
-            # Si no se encontró ninguna clave, retornar cadena vacía
-            return ""
-
-        # Extraer metadatos específicos
-        title = get_tag(['title', 'TIT2'])
-        artist = get_tag(['artist', 'TPE1'])
-        album_artist = get_tag(['albumartist', 'TPE2'])
-        album = get_tag(['album', 'TALB'])
-        year = get_tag(['date', 'year', 'TDRC', 'TYER'])
-        track = get_tag(['tracknumber', 'TRCK'])
-        disc = get_tag(['discnumber', 'TPOS'])
-        publisher = get_tag(['publisher', 'TPUB'])
-        composer = get_tag(['composer', 'TCOM'])
-        genre = get_tag(['genre', 'TCON'])
-
-        # Obtener duración y bitrate
-        def get_duration_and_bitrate(audio, filepath):
-            duration = 0
-            bitrate = 0
-            #Verificar si audio tiene info y atributos length y bitrate
-            if audio.info:
-                if hasattr(audio.info, 'length'):
-                    duration = audio.info.length # Duración en segundos
-                if hasattr(audio.info, 'bitrate'):
-                    bitrate = audio.info.bitrate // 1000 # Bitrate en kbps
-                #Si el bitrate es 0 pero duración es mayor a 0, estimar bitrate
-                if bitrate == 0 and duration > 0:
-                    try:
-                        file_size = os.path.getsize(filepath) # Tamaño del archivo en bytes
-                        bitrate = int((file_size * 8) / (duration * 1000)) # Estimar bitrate en kbps
-                    except Exception:
-                        bitrate = 0 # Si hay error, dejar en 0
-                #Si la duración es 0 pero el bitrate es mayor a 0, estimar duración
-                elif duration == 0 and bitrate > 0:
-                    try:
-                        file_size = os.path.getsize(filepath) # Tamaño del archivo en bytes
-                        duration = (file_size * 8) / (bitrate * 1000) # Estimar duración en segundos
-                    except Exception:
-                        duration = 0 # Si hay error, dejar en 0
-                #Si ambos son 0, intentar estimar ambos
-                elif duration == 0 and bitrate == 0:
-                    try:
-                        file_size = os.path.getsize(filepath) # Tamaño del archivo en bytes
-                        # Estimar duración y bitrate asumiendo un bitrate promedio de 192 kbps
-                        estimated_bitrate = 192
-                        duration = (file_size * 8) / (estimated_bitrate * 1000) # Estimar duración en segundos
-                        bitrate = estimated_bitrate # Usar bitrate estimado
-                    except Exception:
-                        duration = 0
-                        bitrate = 0 # Si hay error, dejar ambos en 0
-            return duration, bitrate
-
-        duration, bitrate = get_duration_and_bitrate(audio, filepath) # Obtener duración y bitrate
-
-        # Función para normalizar campos numéricos (track, disc)
-        def normalize_number_field(field):
-            #Si el campo es None, retornar cadena vacía
-            if not field:
-                return ""
-            field_str = str(field) # Convertir a cadena
-
-            # Verificar si el campo tiene formato "X/Y"
-            if '/' in field_str:
-                parts = field_str.split('/') # Dividir por '/'
-
-                # Verificar que ambas partes sean dígitos
-                if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
-                    return field_str
-            elif field_str.isdigit():
-                return field_str
-            return ""
-
-        track = normalize_number_field(track) # Normalizar campo track
-        disc = normalize_number_field(disc) # Normalizar campo disc
-
-        # Retornar diccionario con metadatos
-        return {
-            "path": filepath,
-            "title": title or "",
-            "artist": artist or "",
-            "album_artist": album_artist or "",
-            "album": album or "",
-            "year": year or "",
-            "track": track,
-            "disc": disc,
-            "publisher": publisher or "",
-            "composer": composer or "",
-            "genre": genre or "",
-            "duration": duration,
-            "bitrate": bitrate,
-        }
-    
-    # Manejar cualquier excepción y retornar None
-    except Exception as e:
-        print(f"Error al procesar {filepath}: {e}")
-        return None
-
-# Función para convertir segundos a formato legible
-def seconds_to_readable(seconds):
-    days, rem = divmod(seconds, 86400) # 86400 segundos en un día
-    hours, rem = divmod(rem, 3600) # 3600 segundos en una hora
-    minutes, _ = divmod(rem, 60) # 60 segundos en un minuto
-    parts = [] # Lista para partes del tiempo
-
-    # Construir la cadena legible
-    if days > 0: # Agregar días si hay
-        parts.append(f"{int(days)} días")
-    if hours > 0: # Agregar horas si hay
-        parts.append(f"{int(hours)} horas")
-    if minutes > 0: # Agregar minutos si hay
-        parts.append(f"{int(minutes)} minutos")
-    return ", ".join(parts) if parts else "0 minutos" # Retornar cadena legible
-
-# Función para analizar la biblioteca y generar un resumen
-def analyze_library(metadata_list, elapsed_time):
-    try:
-        from collections import Counter # Para contar elementos
-        import time # Para medir tiempos
-    except ImportError:
-        print("No se pudo importar módulos necesarios para el análisis. Asegúrate de tener Python instalado correctamente.")
-        return {}
-
-    count = len(metadata_list) # Número total de archivos analizados
-    total_duration = sum(m['duration'] for m in metadata_list) # Duración total en segundos
-    total_bitrate = sum(m['bitrate'] for m in metadata_list if m['bitrate'] > 0) # Bitrate total
-    bitrate_avg = total_bitrate / count if count else 0 # Bitrate promedio
-    duration_avg = total_duration / count if count else 0 # Duración promedio
-
-    artists = set(m['artist'] for m in metadata_list if m['artist']) # Artistas únicos
-    album_artists = set(m['album_artist'] for m in metadata_list if m['album_artist']) # Artistas de álbum únicos
-    albums = set(m['album'] for m in metadata_list if m['album']) # Álbumes únicos
-
-    # Tiempo total para escuchar toda la música
-    total_listen_seconds = total_duration # en segundos
-    total_listen_readable = seconds_to_readable(total_listen_seconds) # Formatear tiempo total de escucha
-
-    # Género predominante (el más común)
-    genres = [m['genre'] for m in metadata_list if m['genre']] # Lista de géneros
-    genre_counter = Counter(genres) # Contar ocurrencias de cada género
-    genre_predominant = genre_counter.most_common(1)[0][0] if genre_counter else "" # Género más común
-    
-    # Generar el resumen
-    summary = {
-        "archivos_analizados": count,
-        "tiempo_total_segundos": round(elapsed_time, 2),
-        "tiempo_total_formateado": time.strftime("%H:%M:%S", time.gmtime(elapsed_time)),
-        "bitrate_promedio_kbps": round(bitrate_avg, 1),
-        "duracion_promedio_segundos": round(duration_avg, 2),
-        "duracion_promedio_formateada": time.strftime("%M:%S", time.gmtime(duration_avg)),
-        "artistas_unicos": len(artists),
-        "album_artistas_unicos": len(album_artists),
-        "albumes_unicos": len(albums),
-        "tiempo_total_escucha": total_listen_readable,
-        "genero_predominante": genre_predominant
-    }
-
-    return summary # Retornar el resumen generado
-
-# Función principal del script
-def main_script(music_dir: str, usar_ia: Optional[bool] = False):
-    #Importar módulos necesarios
-    import json # Para manejar JSON
-    import time # Para medir tiempos
-    from datetime import datetime # Para manejar fechas y horas
-    from multiprocessing import Pool, cpu_count # Para procesamiento paralelo
-
-    # Intentar importar tqdm
-    try:
-        from tqdm import tqdm # Para barra de progreso
-    except ImportError:
-        print("Por favor, instála el archivo requirements.txt")
-        return
-    
-    client = None
-    if usar_ia:
-        try:
-            
-            # Importar módulos necesarios para IA
-            from dotenv import load_dotenv # Para cargar variables de entorno
-            from google import genai # Cliente de Google Generative AI
-
-            load_dotenv() # Cargar variables de entorno desde .env
-
-            if os.getenv("GEMINI_API_KEY") is None:
-                print("La variable de entorno GEMINI_API_KEY no está configurada.")
-                usar_ia = False
-
-            client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))  # Inicializar el cliente de Google Generative AI
-        except ImportError:
-            print("Instala el archivo requirements.txt para usar IA.")
-            usar_ia = False
-        except ValueError as ve:
-            print(ve)
-            usar_ia = False
-    
-    # Configuración de Rutas y Fecha (Ahora dentro de main)
-    summary_dir = BASE_DIR / "summary"
-    timestamp = datetime.now().strftime("%d%m%Y_%H%M%S")
-    timestamp_dir = summary_dir / timestamp
-    output_file = timestamp_dir / f"musica_metadatos_{timestamp}.json"
-    summary_file = timestamp_dir / f"musica_metadatos_resumen_{timestamp}.json"
-    analisis_ia = timestamp_dir / f"musica_metadatos_resumen_ia_{timestamp}.txt"
-    
-    audio_extensions = (".mp3", ".flac", ".wav", ".m4a", ".aac", ".ogg")  # Extensiones de audio soportadas
-    
-    print(f"🎵 Buscando archivos de audio en {music_dir}...")
-    files = []
-    for root, _, filenames in os.walk(music_dir):
-        for f in filenames:
-            if f.lower().endswith(audio_extensions):
-                files.append(os.path.join(root, f))
-    total_files = len(files)
-    print(f"🎵 Archivos encontrados: {total_files}")
-
-    start_time = time.time()
-
-    # Procesar con multiprocessing y tqdm para barra de progreso
-    with Pool(processes=cpu_count()) as pool: results = list(tqdm(pool.imap(get_audio_metadata, files), total=total_files, unit="archivo"))
-
-    # Filtrar None (archivos no procesados)
-    results = [r for r in results if r is not None]
-
-    elapsed_time = time.time() - start_time
-
-    # Asegurarse de que el directorio de resumen exista
-    summary_dir.mkdir(parents=True, exist_ok=True)
-
-    # Asegurarse de que el directorio con timestamp exista
-    timestamp_dir.mkdir(parents=True, exist_ok=True)
-
-    # Generar resumen y guardar aparte
-    summary = analyze_library(results, elapsed_time)
-
-    if usar_ia:
-        # Avisar que se esperará respuesta de IA por posible demora
-        print("🤖 Usando IA para análisis adicional, esto puede tardar unos momentos...")
-        # Usar barra de progreso infinita mientras se espera la respuesta de IA
-        tqdm_bar = tqdm(total=1, desc="Esperando respuesta de IA", bar_format="{desc} {bar} | {elapsed}")
-
-        try:
-            
-            prompt = f"""
-            Eres un experto crítico musical y analista de datos.
-            Analiza el siguiente resumen estadístico de una biblioteca musical personal:
-            
-            {json.dumps(summary)}
-            
-            Por favor dime:
-            1. ¿Qué dice el bitrate promedio sobre la calidad de audio que prefiere el usuario?
-            2. Basado en la duración promedio y el género, ¿es coherente? (Ej: canciones de punk suelen ser cortas, prog largas).
-            3. Calcula mentalmente la variedad: ¿Hay muchos artistas para la cantidad de canciones o escucha siempre a los mismos?
-            4. Dame una conclusión breve sobre el perfil de este oyente.
-            """
-
-            response = client.models.generate_content(model="gemini-2.5-flash", contents=prompt) if client is not None else "Sin respuesta IA debido a un error."
-        except Exception as e:
-            print(f"Error al usar IA: {e}")
-            response = "Sin respuesta IA debido a un error."
-        
-        # Agregar análisis de IA al resumen JSON como dato crudo.
-        if response and not isinstance(response, str) and hasattr(response, 'text') and response.text is not None:
-            # Terminar la barra de progreso
-            tqdm_bar.update(1)
-            texto_ia = response.text if not isinstance(response, str) else response
-            summary["analisis_ia"] = texto_ia
-
-            #guardar análisis de IA en archivo de texto
-            with open(analisis_ia, "w", encoding="utf-8") as f:
-                tqdm_bar.close()
-                f.write("Análisis de IA:\n\n")
-                f.write(texto_ia)
-        elif response and isinstance(response, str):
-            tqdm_bar.update(1)
-            tqdm_bar.close()
-            texto_ia = response
-            summary["analisis_ia"] = texto_ia
-            # no guardamos archivo de IA si es solo un mensaje de error
-        else:
-            tqdm_bar.update(1)
-            tqdm_bar.close()
-            texto_ia = "Sin respuesta IA."
-            summary["analisis_ia"] = texto_ia
-    
-    # Guardar resumen en JSON
-    with open(summary_file, "w", encoding="utf-8") as f:
-        json.dump(summary, f, ensure_ascii=False, indent=2)
-
-    # Guardar metadatos en JSON
-    with open(output_file, "w", encoding="utf-8") as f:
-        json.dump(results, f, ensure_ascii=False, indent=2)
-
-    print(f"✅ Proceso completado: {output_file} generado con {len(results)} archivos.") # Indicar archivo generado
-    print(f"✅ Resumen de metadatos guardado en: {summary_file}") # Indicar archivo de resumen generado
-    print(f"⏱️ Tiempo total de análisis: {round(elapsed_time, 2)} segundos.") # Indicar tiempo total
-    if usar_ia:
-        print(f"🤖 Análisis de IA guardado en: {analisis_ia}")
-
-def main():
-    parser = argparse.ArgumentParser(description="Generar resumen de metadatos de archivos de audio en un directorio.")
-    parser.add_argument("--music_dir", type=str, help="Directorio donde buscar archivos de audio.")
-    parser.add_argument("--usar_ia", action="store_true", help="Usar IA para análisis adicional.")
-    args = parser.parse_args()
-
-    if not args.music_dir:
-        print("Por favor, especifica el directorio de música usando --music_dir")
-        return
-
-    main_script(args.music_dir, usar_ia=True) if args.usar_ia else main_script(args.music_dir) # Ejecutar función principal con IA si se especifica de lo contrario sin IA.
-
-if __name__ == "__main__":
-    main()
+"""
+Script para generar un resumen de metadatos de archivos de audio en un directorio específico y opcionalmente usar IA para análisis adicional.
+"""
+
+# Importaciones necesarias
+import os # Para operaciones del sistema
+import re # Para validar campos numéricos
+import sys # Para internar cadenas repetidas
+import argparse # Para manejar argumentos de línea de comandos
+import json # Para manejar JSON
+import filecmp # Para confirmar duplicados comparando su contenido
+import time # Para medir tiempos
+from array import array # Para guardar los campos numéricos en arreglos contiguos
+from collections import Counter # Para contar elementos
+from datetime import datetime # Para manejar fechas y horas
+from functools import lru_cache # Para importar numpy y compilar el núcleo de agregación una sola vez
+import importlib # Para precargar módulos en los procesos del pool
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait # Para procesamiento paralelo
+from itertools import islice # Para agrupar rutas en bloques
+from pathlib import Path # Para manejar rutas de archivos
+from typing import Optional # Para anotaciones de tipos opcionales
+
+BASE_DIR = Path(__file__).resolve().parent # Directorio base del script
+SUMMARY_DIR = BASE_DIR / "summary" # Directorio para los resúmenes
+AUDIO_EXTENSIONS = frozenset({".mp3", ".flac", ".wav", ".m4a", ".aac", ".ogg"}) # Extensiones de audio soportadas
+SKIP_DIRS = frozenset({"__MACOSX", "$RECYCLE.BIN", "System Volume Information"}) # Carpetas del sistema que no contienen música (además de las ocultas)
+CHUNKSIZE = 16 # Archivos por bloque enviado a cada proceso
+FINGERPRINT_SIZE = 4096 # Bytes iniciales que se comparan para confirmar un duplicado
+CPU_CORES = os.cpu_count() or 2 # Número de procesos para leer metadatos
+MUTAGEN_FORMATS = ("mutagen.mp3", "mutagen.flac", "mutagen.mp4", "mutagen.aac", "mutagen.wave", "mutagen.oggvorbis", "mutagen.oggopus", "mutagen.oggflac") # Módulos de formato de mutagen
+# Claves posibles de cada campo (nombres de Vorbis/MP4/APE y frames ID3)
+TAG_KEYS = {
+    "title": ('title', 'TIT2'),
+    "artist": ('artist', 'TPE1'),
+    "album_artist": ('albumartist', 'TPE2'),
+    "album": ('album', 'TALB'),
+    "year": ('date', 'year', 'TDRC', 'TYER'),
+    "track": ('tracknumber', 'TRCK'),
+    "disc": ('discnumber', 'TPOS'),
+    "publisher": ('publisher', 'TPUB'),
+    "composer": ('composer', 'TCOM'),
+    "genre": ('genre', 'TCON'),
+}
+_tag_key_cache = {} # Última clave encontrada por (extensión, campo) en este proceso
+NUMBER_FIELD_RE = re.compile(r"\d+(?:/\d+)?") # Campos numéricos válidos: "X" o "X/Y"
+
+# Opcional: orjson para serializar rápido el JSON de metadatos
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Lectores de metadatos: mutagen-rs (implementación en Rust con la misma API) si está instalado, y mutagen.
+# mutagen-rs solo reconoce algunos formatos (no .wav, p. ej.), así que mutagen lee los que no reconoce.
+# Se importan una sola vez por proceso en lugar de en cada archivo.
+try:
+    from mutagen_rs import File as _RsMutagenFile
+except ImportError:
+    _RsMutagenFile = None
+try:
+    from mutagen._file import File as _MutagenFile
+except ImportError:
+    _MutagenFile = None
+
+# Función auxiliar para abrir un archivo de audio con el lector disponible
+def open_audio(filepath):
+    """
+    Abre un archivo de audio con mutagen-rs si está instalado; si no reconoce el formato (None) o falla,
+    con mutagen. Retorna None si ningún lector lo reconoce.
+    """
+    if _RsMutagenFile is not None:
+        try:
+            audio = _RsMutagenFile(filepath, easy=False)
+        except Exception:
+            audio = None # Se reintenta con mutagen
+        if audio is not None or _MutagenFile is None:
+            return audio
+    return _MutagenFile(filepath, easy=False)
+
+# Función auxiliar para convertir el valor de una etiqueta en cadena
+def tag_text(val):
+    """Retorna el valor de una etiqueta como cadena (cadena vacía si está vacío)."""
+    # Sí val es un objeto con atributo 'text' (como en ID3, también en mutagen-rs), manejarlo
+    if val and hasattr(val, 'text'):
+        # Sí val es una lista, retornar el primer elemento
+        if isinstance(val.text, list) and val.text:
+            return str(val.text[0])
+    # Si val es una lista, retornar el primer elemento
+    elif isinstance(val, list):
+        if val:
+            return str(val[0])
+    # Si val es un valor simple, retornarlo como cadena
+    elif val:
+        return str(val)
+    return ""
+
+# Función auxiliar para obtener el valor de una etiqueta
+def get_tag(tags, field, ext):
+    """
+    Retorna como cadena el valor de un campo (clave de TAG_KEYS) probando sus claves posibles
+    (cadena vacía si ninguna). Primero prueba la última clave que funcionó para la misma extensión,
+    ya que en una biblioteca cada formato usa siempre la misma (p. ej. TIT2 en .mp3, title en .flac).
+    """
+    cache_key = (ext, field)
+    cached = _tag_key_cache.get(cache_key)
+    if cached is not None:
+        value = tag_text(tags.get(cached)) # Un solo acceso en el caso habitual
+        if value:
+            return value
+
+    # Probar varias claves posibles para cada campo
+    for key in TAG_KEYS[field]:
+        # Verificar si la clave existe en las etiquetas
+        if key in tags:
+            value = tag_text(tags.get(key))
+            if value:
+                _tag_key_cache[cache_key] = key # Recordar la clave para esta extensión
+                return value
+    # Si no se encontró ninguna clave, retornar cadena vacía
+    return ""
+
+# Función para obtener duración y bitrate
+def get_duration_and_bitrate(audio, filepath, file_size=None):
+    """
+    Retorna (duración en segundos, bitrate en kbps), estimando el que falte a partir del tamaño del archivo
+    (file_size si ya se conoce del recorrido; si no, se consulta con un stat).
+    """
+    duration = 0
+    bitrate = 0
+    #Verificar si audio tiene info y atributos length y bitrate
+    if audio.info:
+        if hasattr(audio.info, 'length'):
+            duration = audio.info.length # Duración en segundos
+        if hasattr(audio.info, 'bitrate'):
+            bitrate = audio.info.bitrate // 1000 # Bitrate en kbps
+        #Solo si falta la duración o el bitrate hace falta el tamaño del archivo (un único stat si no se conoce)
+        if duration == 0 or bitrate == 0:
+            if file_size is None:
+                try:
+                    file_size = os.path.getsize(filepath) # Tamaño del archivo en bytes
+                except OSError:
+                    pass # Si hay error, dejar los valores en 0
+            if file_size is not None:
+                #Si el bitrate es 0 pero duración es mayor a 0, estimar bitrate
+                if bitrate == 0 and duration > 0:
+                    bitrate = int((file_size * 8) / (duration * 1000)) # Estimar bitrate en kbps
+                #Si la duración es 0 pero el bitrate es mayor a 0, estimar duración
+                elif duration == 0 and bitrate > 0:
+                    duration = (file_size * 8) / (bitrate * 1000) # Estimar duración en segundos
+                #Si ambos son 0, estimar ambos asumiendo un bitrate promedio de 192 kbps
+                elif duration == 0 and bitrate == 0:
+                    estimated_bitrate = 192
+                    duration = (file_size * 8) / (estimated_bitrate * 1000) # Estimar duración en segundos
+                    bitrate = estimated_bitrate # Usar bitrate estimado
+    return duration, bitrate
+
+# Función para normalizar campos numéricos (track, disc)
+def normalize_number_field(field):
+    """Retorna el campo como cadena si tiene formato "X" o "X/Y" (solo dígitos), si no cadena vacía."""
+    field_str = str(field) if field else "" # Si el campo es None, cadena vacía
+    return field_str if NUMBER_FIELD_RE.fullmatch(field_str) else "" # Validar en una sola pasada del motor de re
+
+# Función que extrae metadatos de un archivo de audio
+def get_audio_metadata(filepath, file_size=None):
+
+    """Extrae metadatos a un archivo de audio usando mutagen (o mutagen-rs si está instalado); file_size es su tamaño si ya se conoce."""
+
+    if _MutagenFile is None and _RsMutagenFile is None:
+        print("Por favor, instála el archivo requirements.txt")
+        return None
+
+    # Intentar leer el archivo de audio
+    try:
+        audio = open_audio(filepath) # Cargar con mutagen-rs o mutagen
+        # Si no se pudo leer, retornar None
+        if audio is None:
+            return None
+        
+        tags = audio.tags or {} # Obtener etiquetas, manejar None
+        ext = filepath[filepath.rfind("."):].lower() # Extensión para la caché de claves
+
+        # Extraer metadatos específicos
+        title = get_tag(tags, "title", ext)
+        artist = get_tag(tags, "artist", ext)
+        album_artist = get_tag(tags, "album_artist", ext)
+        album = get_tag(tags, "album", ext)
+        year = get_tag(tags, "year", ext)
+        track = get_tag(tags, "track", ext)
+        disc = get_tag(tags, "disc", ext)
+        publisher = get_tag(tags, "publisher", ext)
+        composer = get_tag(tags, "composer", ext)
+        genre = get_tag(tags, "genre", ext)
+
+        duration, bitrate = get_duration_and_bitrate(audio, filepath, file_size) # Obtener duración y bitrate
+
+        track = normalize_number_field(track) # Normalizar campo track
+        disc = normalize_number_field(disc) # Normalizar campo disc
+
+        # Retornar diccionario con metadatos
+        return {
+            "path": filepath,
+            "title": title or "",
+            "artist": artist or "",
+            "album_artist": album_artist or "",
+            "album": album or "",
+            "year": year or "",
+            "track": track,
+            "disc": disc,
+            "publisher": publisher or "",
+            "composer": composer or "",
+            "genre": genre or "",
+            "duration": duration,
+            "bitrate": bitrate,
+        }
+    
+    # Manejar cualquier excepción y retornar None
+    except Exception as e:
+        print(f"Error al procesar {filepath}: {e}")
+        return None
+
+# Inicializador de los procesos del pool
+def _worker_init():
+    """
+    Prepara cada proceso del pool una sola vez: mutagen importa el módulo de cada formato dentro
+    de File(), así que se cargan de antemano para que el primer archivo de cada proceso no pague esas importaciones.
+    """
+    if _MutagenFile is None:
+        return # Sin mutagen no hay nada que precargar (mutagen-rs no importa módulos por formato)
+    for module in MUTAGEN_FORMATS:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass # Formato no disponible en esta versión de mutagen
+
+# Función que procesa un bloque de archivos en un proceso del pool
+def get_metadata_chunk(files):
+    """Extrae los metadatos de un bloque de archivos (ruta, tamaño) (un solo viaje entre procesos por bloque)."""
+    return [get_audio_metadata(filepath, file_size) for filepath, file_size in files]
+
+# Función que reparte los archivos entre procesos y genera sus metadatos
+def iter_metadata(files, workers=CPU_CORES):
+    """
+    Envía los archivos (ruta, tamaño) en bloques de CHUNKSIZE a un ProcessPoolExecutor a medida que llegan del generador
+    y genera (índice_inicial, metadatos del bloque) según terminan los bloques, sin orden; el índice es la
+    posición del primer archivo del bloque en el recorrido. Se mantienen como máximo 4 bloques en curso
+    por proceso para que el recorrido avance sin acumular todo en memoria.
+    """
+    files = iter(files)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_worker_init) as executor:
+        pending = {} # Bloques en curso -> índice inicial
+        start = 0 # Índice del siguiente bloque
+        while chunk := list(islice(files, CHUNKSIZE)):
+            pending[executor.submit(get_metadata_chunk, chunk)] = start
+            start += len(chunk)
+            if len(pending) >= workers * 4:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED) # Esperar a que termine algún bloque
+                for future in done:
+                    yield pending.pop(future), future.result()
+        # Recoger los bloques restantes
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield pending.pop(future), future.result()
+
+# Función que recorre el directorio y genera los archivos de audio
+def iter_audio_files(root):
+    """
+    Recorre recursivamente un directorio con os.scandir y genera los archivos de audio (DirEntry)
+    a medida que los encuentra, para que el pool empiece a leer metadatos sin esperar al recorrido.
+    DirEntry reutiliza el tipo devuelto por el sistema al listar, evitando un stat() extra por entrada.
+    No entra en carpetas ocultas (.git, .Trash, miniaturas...) ni en las de SKIP_DIRS.
+    """
+    pending = [os.fspath(root)] # Directorios pendientes de recorrer
+    while pending:
+        try:
+            with os.scandir(pending.pop()) as it:
+                for entry in it:
+                    name = entry.name
+                    if entry.is_dir(follow_symlinks=False):
+                        if not name.startswith(".") and name not in SKIP_DIRS:
+                            pending.append(entry.path) # Recorrer subdirectorio
+                        continue
+                    # Solo se pasa a minúsculas la extensión (sin punto, name[-1:] nunca coincide)
+                    if name[name.rfind("."):].lower() in AUDIO_EXTENSIONS and entry.is_file():
+                        yield entry
+        except OSError:
+            continue # Directorio ilegible: omitir como hace os.walk
+
+# Función que lee la huella (bytes iniciales) de un archivo
+def file_fingerprint(filepath):
+    """Retorna los primeros FINGERPRINT_SIZE bytes del archivo (None si no se puede leer)."""
+    try:
+        with open(filepath, "rb") as f:
+            return f.read(FINGERPRINT_SIZE)
+    except OSError:
+        return None
+
+# Función que confirma un duplicado comparando el contenido completo
+def same_contents(path_a, path_b):
+    """Retorna True si dos archivos tienen el mismo contenido byte a byte (False si no se pueden leer)."""
+    try:
+        return filecmp.cmp(path_a, path_b, shallow=False)
+    except OSError:
+        return False
+
+# Función que omite los archivos duplicados antes de leer sus metadatos
+def iter_unique_files(entries, duplicates):
+    """
+    Genera (ruta, tamaño) de los archivos omitiendo los duplicados, detectados con stat() y sin leer metadatos
+    (el tamaño se pasa a los procesos para no volver a consultarlo; None si falló el stat):
+        - el mismo archivo con otra ruta (mismo dispositivo e inodo, p. ej. enlaces duros o montajes repetidos).
+        - copias idénticas (mismo tamaño y fecha de modificación; se descartan primero comparando los
+          primeros bytes y se confirma comparando el archivo completo, solo cuando hay coincidencia).
+    Anota cada duplicado en duplicates = {ruta_original: [rutas_duplicadas]} para reutilizar sus metadatos.
+    """
+    seen_inodes = {} # (dispositivo, inodo) -> ruta original
+    seen_stats = {} # (tamaño, mtime_ns) -> [[ruta original, huella (se lee al primer choque)], ...]
+    for entry in entries:
+        path = entry.path
+        try:
+            st = entry.stat() # En Windows viene del listado; en POSIX es un stat()
+        except OSError:
+            yield path, None # Sin stat no se puede comparar: procesar igualmente
+            continue
+
+        original = None
+        if st.st_ino: # El listado de Windows no informa el inodo
+            inode = (st.st_dev, st.st_ino)
+            original = seen_inodes.setdefault(inode, path)
+            if original == path:
+                original = None
+        if original is None:
+            candidates = seen_stats.get((st.st_size, st.st_mtime_ns))
+            if candidates is None:
+                seen_stats[(st.st_size, st.st_mtime_ns)] = [[path, None]] # Caso habitual: sin choque, sin leer nada
+            else:
+                fingerprint = file_fingerprint(path)
+                for candidate in candidates:
+                    if candidate[1] is None:
+                        candidate[1] = file_fingerprint(candidate[0])
+                    if fingerprint is not None and candidate[1] == fingerprint and same_contents(candidate[0], path):
+                        original = candidate[0]
+                        break
+                else:
+                    candidates.append([path, fingerprint]) # Mismo tamaño y fecha pero distinto contenido
+
+        if original is None:
+            yield path, st.st_size
+        else:
+            duplicates.setdefault(original, []).append(path)
+
+# Función para convertir segundos a formato legible
+def seconds_to_readable(seconds):
+    days, rem = divmod(seconds, 86400) # 86400 segundos en un día
+    hours, rem = divmod(rem, 3600) # 3600 segundos en una hora
+    minutes, _ = divmod(rem, 60) # 60 segundos en un minuto
+    parts = [] # Lista para partes del tiempo
+
+    # Construir la cadena legible
+    if days > 0: # Agregar días si hay
+        parts.append(f"{int(days)} días")
+    if hours > 0: # Agregar horas si hay
+        parts.append(f"{int(hours)} horas")
+    if minutes > 0: # Agregar minutos si hay
+        parts.append(f"{int(minutes)} minutos")
+    return ", ".join(parts) if parts else "0 minutos" # Retornar cadena legible
+
+# Núcleo de agregación: un solo recorrido con acumuladores (compilable con numba)
+def _aggregate_loop(durations, bitrates):
+    total_duration = 0.0
+    total_bitrate = 0.0
+    bitrate_count = 0
+    for i in range(durations.shape[0]):
+        total_duration += durations[i]
+        if bitrates[i] > 0:
+            total_bitrate += bitrates[i]
+            bitrate_count += 1
+    return total_duration, total_bitrate, bitrate_count
+
+@lru_cache(maxsize=None)
+def _numpy():
+    """
+    Importa numpy si está instalado (None si no). Solo se usa al agregar, así que se importa aquí
+    y no al inicio para que los procesos del pool no paguen su carga.
+    """
+    try:
+        import numpy
+    except ImportError:
+        return None
+    return numpy
+
+@lru_cache(maxsize=None)
+def _aggregate_kernel():
+    """
+    Compila _aggregate_loop con numba si está instalado (None si no). Se importa aquí y no al
+    inicio para que los procesos del pool no carguen numba; cache=True guarda la compilación en disco.
+    """
+    try:
+        from numba import njit
+    except ImportError:
+        return None
+    return njit(cache=True, fastmath=True)(_aggregate_loop)
+
+# Función que suma los campos numéricos de la biblioteca
+def aggregate(durations, bitrates):
+    """
+    Retorna (duración_total, bitrate_total, archivos_con_bitrate) a partir de los arreglos de duraciones
+    y bitrates (solo se suman y cuentan los bitrates positivos). Con numpy se trabaja sobre los mismos búferes, sin copiar:
+    con numba, en un solo recorrido compilado; si no, con sumas vectorizadas. Sin numpy, con sum().
+    """
+    np = _numpy()
+    if np is not None:
+        durations = np.frombuffer(durations, dtype=np.float64)
+        bitrates = np.frombuffer(bitrates, dtype=np.float64)
+        kernel = _aggregate_kernel()
+        if kernel is not None:
+            return kernel(durations, bitrates)
+        known = bitrates[bitrates > 0] # Bitrates conocidos
+        return float(durations.sum()), float(known.sum()), int(known.size)
+    known = [b for b in bitrates if b > 0] # Bitrates conocidos
+    return sum(durations), sum(known), len(known)
+
+# Función para analizar la biblioteca y generar un resumen
+def analyze_library(metadata_list, elapsed_time):
+    count = len(metadata_list) # Número total de archivos analizados
+    durations = array("d") # Duraciones en segundos (un arreglo por campo numérico en lugar de un dict por archivo)
+    bitrates = array("d") # Bitrates en kbps
+    artists = set() # Artistas únicos
+    album_artists = set() # Artistas de álbum únicos
+    albums = set() # Álbumes únicos
+    genre_counter = Counter() # Ocurrencias de cada género
+
+    # Una sola pasada por la lista acumulando todos los totales a la vez.
+    # Artistas, álbumes y géneros se repiten mucho: se internan (y se guardan así en m) para que
+    # todos los archivos compartan una sola copia de cada cadena y los conjuntos comparen por identidad.
+    intern = sys.intern
+    for m in metadata_list:
+        durations.append(m['duration'])
+        bitrates.append(m['bitrate'])
+        if artist := m['artist']:
+            m['artist'] = artist = intern(artist)
+            artists.add(artist)
+        if album_artist := m['album_artist']:
+            m['album_artist'] = album_artist = intern(album_artist)
+            album_artists.add(album_artist)
+        if album := m['album']:
+            m['album'] = album = intern(album)
+            albums.add(album)
+        if genre := m['genre']:
+            m['genre'] = genre = intern(genre)
+            genre_counter[genre] += 1
+
+    total_duration, total_bitrate, bitrate_count = aggregate(durations, bitrates) # Duración total, bitrate total y archivos con bitrate
+    bitrate_avg = total_bitrate / bitrate_count if bitrate_count else 0 # Bitrate promedio (solo de archivos con bitrate conocido)
+    duration_avg = total_duration / count if count else 0 # Duración promedio
+
+    # Tiempo total para escuchar toda la música
+    total_listen_seconds = total_duration # en segundos
+    total_listen_readable = seconds_to_readable(total_listen_seconds) # Formatear tiempo total de escucha
+
+    # Género predominante (el más común)
+    genre_predominant = genre_counter.most_common(1)[0][0] if genre_counter else "" # Género más común
+    
+    # Generar el resumen
+    summary = {
+        "archivos_analizados": count,
+        "tiempo_total_segundos": round(elapsed_time, 2),
+        "tiempo_total_formateado": time.strftime("%H:%M:%S", time.gmtime(elapsed_time)),
+        "bitrate_promedio_kbps": round(bitrate_avg, 1),
+        "duracion_promedio_segundos": round(duration_avg, 2),
+        "duracion_promedio_formateada": time.strftime("%M:%S", time.gmtime(duration_avg)),
+        "artistas_unicos": len(artists),
+        "album_artistas_unicos": len(album_artists),
+        "albumes_unicos": len(albums),
+        "tiempo_total_escucha": total_listen_readable,
+        "genero_predominante": genre_predominant
+    }
+
+    return summary # Retornar el resumen generado
+
+# Función para guardar datos en un archivo JSON
+def write_json(path, data):
+    """Guarda data en JSON indentado (UTF-8) usando orjson si está instalado, si no json."""
+    if orjson is not None:
+        with open(path, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2)) # Codificación en C directamente a bytes, en una sola escritura
+    else:
+        # json.dump escribe muchos fragmentos pequeños: un búfer de 1 MiB los agrupa en pocas llamadas al sistema
+        with open(path, "w", encoding="utf-8", buffering=1 << 20) as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+
+# Función principal del script
+def main_script(music_dir: str, usar_ia: Optional[bool] = False):
+    # Intentar importar tqdm
+    try:
+        from tqdm import tqdm # Para barra de progreso
+    except ImportError:
+        print("Por favor, instála el archivo requirements.txt")
+        return
+    
+    client = None
+    if usar_ia:
+        try:
+            
+            # Importar módulos necesarios para IA
+            from dotenv import load_dotenv # Para cargar variables de entorno
+            from google import genai # Cliente de Google Generative AI
+
+            load_dotenv() # Cargar variables de entorno desde .env
+
+            if os.getenv("GEMINI_API_KEY") is None:
+                print("La variable de entorno GEMINI_API_KEY no está configurada.")
+                usar_ia = False
+
+            client = genai.Client(api_key=os.getenv("GEMINI_API_KEY"))  # Inicializar el cliente de Google Generative AI
+        except ImportError:
+            print("Instala el archivo requirements.txt para usar IA.")
+            usar_ia = False
+        except ValueError as ve:
+            print(ve)
+            usar_ia = False
+    
+    # Configuración de Rutas y Fecha (Ahora dentro de main); las rutas de archivo se preparan como str una sola vez
+    timestamp = datetime.now().strftime("%d%m%Y_%H%M%S")
+    timestamp_dir = SUMMARY_DIR / timestamp
+    output_file = os.fspath(timestamp_dir / f"musica_metadatos_{timestamp}.json")
+    summary_file = os.fspath(timestamp_dir / f"musica_metadatos_resumen_{timestamp}.json")
+    analisis_ia = os.fspath(timestamp_dir / f"musica_metadatos_resumen_ia_{timestamp}.txt")
+    
+    print(f"🎵 Buscando archivos de audio en {music_dir}...")
+
+    start_time = time.time()
+
+    # Procesar con varios procesos y tqdm para barra de progreso.
+    # Los archivos llegan al pool en bloques mientras continúa el recorrido.
+    # Los resultados se reciben según terminan y se colocan por índice, así el JSON conserva el orden del recorrido.
+    duplicates = {} # Archivos duplicados por ruta del original
+    files = iter_unique_files(iter_audio_files(music_dir), duplicates)
+    results = [] # Metadatos en el orden del recorrido (los bloques terminan en cualquier orden)
+    with tqdm(unit="archivo") as pbar:
+        for start, chunk_results in iter_metadata(files):
+            end = start + len(chunk_results)
+            if end > len(results):
+                results.extend([None] * (end - len(results))) # Reservar los huecos hasta el final del bloque
+            results[start:end] = chunk_results # Escribir cada resultado en su posición
+            pbar.update(len(chunk_results))
+
+    # Los duplicados reutilizan los metadatos de su original (solo cambia la ruta)
+    total_duplicates = sum(len(paths) for paths in duplicates.values())
+    total_files = len(results) + total_duplicates
+    if duplicates:
+        ordered = [] # Cada copia justo después de su original, para conservar el orden del recorrido
+        for r in results:
+            ordered.append(r)
+            if r is not None:
+                ordered.extend(dict(r, path=path) for path in duplicates.get(r["path"], ()))
+        results = ordered
+    print(f"🎵 Archivos encontrados: {total_files} ({total_duplicates} duplicados sin volver a leer)")
+
+    # Filtrar None (archivos no procesados)
+    results = [r for r in results if r is not None]
+
+    elapsed_time = time.time() - start_time
+
+    # Asegurarse de que el directorio con timestamp (y el de resumen) exista
+    timestamp_dir.mkdir(parents=True, exist_ok=True)
+
+    # Generar resumen y guardar aparte
+    summary = analyze_library(results, elapsed_time)
+
+    if usar_ia:
+        # Avisar que se esperará respuesta de IA por posible demora
+        print("🤖 Usando IA para análisis adicional, esto puede tardar unos momentos...")
+        # Usar barra de progreso infinita mientras se espera la respuesta de IA
+        tqdm_bar = tqdm(total=1, desc="Esperando respuesta de IA", bar_format="{desc} {bar} | {elapsed}")
+
+        try:
+            
+            prompt = f"""
+            Eres un experto crítico musical y analista de datos.
+            Analiza el siguiente resumen estadístico de una biblioteca musical personal:
+            
+            {json.dumps(summary)}
+            
+            Por favor dime:
+            1. ¿Qué dice el bitrate promedio sobre la calidad de audio que prefiere el usuario?
+            2. Basado en la duración promedio y el género, ¿es coherente? (Ej: canciones de punk suelen ser cortas, prog largas).
+            3. Calcula mentalmente la variedad: ¿Hay muchos artistas para la cantidad de canciones o escucha siempre a los mismos?
+            4. Dame una conclusión breve sobre el perfil de este oyente.
+            """
+
+            response = client.models.generate_content(model="gemini-2.5-flash", contents=prompt) if client is not None else "Sin respuesta IA debido a un error."
+        except Exception as e:
+            print(f"Error al usar IA: {e}")
+            response = "Sin respuesta IA debido a un error."
+        
+        # Agregar análisis de IA al resumen JSON como dato crudo.
+        if response and not isinstance(response, str) and hasattr(response, 'text') and response.text is not None:
+            # Terminar la barra de progreso
+            tqdm_bar.update(1)
+            texto_ia = response.text if not isinstance(response, str) else response
+            summary["analisis_ia"] = texto_ia
+
+            #guardar análisis de IA en archivo de texto
+            with open(analisis_ia, "w", encoding="utf-8") as f:
+                tqdm_bar.close()
+                f.write("Análisis de IA:\n\n")
+                f.write(texto_ia)
+        elif response and isinstance(response, str):
+            tqdm_bar.update(1)
+            tqdm_bar.close()
+            texto_ia = response
+            summary["analisis_ia"] = texto_ia
+            # no guardamos archivo de IA si es solo un mensaje de error
+        else:
+            tqdm_bar.update(1)
+            tqdm_bar.close()
+            texto_ia = "Sin respuesta IA."
+            summary["analisis_ia"] = texto_ia
+    
+    # Guardar resumen en JSON
+    write_json(summary_file, summary)
+
+    # Guardar metadatos en JSON
+    write_json(output_file, results)
+
+    print(f"✅ Proceso completado: {output_file} generado con {len(results)} archivos.") # Indicar archivo generado
+    print(f"✅ Resumen de metadatos guardado en: {summary_file}") # Indicar archivo de resumen generado
+    print(f"⏱️ Tiempo total de análisis: {round(elapsed_time, 2)} segundos.") # Indicar tiempo total
+    if usar_ia:
+        print(f"🤖 Análisis de IA guardado en: {analisis_ia}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Generar resumen de metadatos de archivos de audio en un directorio.")
+    parser.add_argument("--music_dir", type=str, help="Directorio donde buscar archivos de audio.")
+    parser.add_argument("--usar_ia", action="store_true", help="Usar IA para análisis adicional.")
+    args = parser.parse_args()
+
+    if not args.music_dir:
+        print("Por favor, especifica el directorio de música usando --music_dir")
+        return
+
+    main_script(args.music_dir, usar_ia=True) if args.usar_ia else main_script(args.music_dir) # Ejecutar función principal con IA si se especifica de lo contrario sin IA.
+
+if __name__ == "__main__":
+    main()